@@ -11,7 +11,7 @@ from .host_monitor import start_host_monitoring
 from .serial_monitor import start_serial_monitoring
 from .serial_manager import get_serial_manager, shutdown_serial_manager
 from .camera_monitor import start_camera_monitoring
-from .file_processor import process_new_video
+from .file_processor import process_new_video, notify_file_closed, set_close_events_supported
 from .handlers.status_handler import StatusHandler
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
@@ -40,6 +40,12 @@ class VideoFileHandler(FileSystemEventHandler):
                 self.logger.info(f"Novo arquivo detectado: {file_path}")
                 self._schedule_async_processing(file_path)
 
+    def on_closed(self, event):
+        """Chamado quando um arquivo aberto para escrita é fechado (inotify IN_CLOSE_WRITE)"""
+        if not event.is_directory and event.src_path.endswith('.mp4'):
+            if self.loop and not self.loop.is_closed():
+                notify_file_closed(event.src_path, self.loop)
+
     def _schedule_async_processing(self, file_path: str):
         """Agenda o processamento assíncrono do arquivo de vídeo"""
         try:
@@ -192,6 +198,8 @@ class BackgroundManager:
             
             self.observer = Observer()
             self.observer.schedule(event_handler, str(app_config.VIDEO_DIR), recursive=True)
+            # Apenas o backend inotify (Linux) entrega eventos de fechamento de arquivo
+            set_close_events_supported(type(self.observer).__name__ == "InotifyObserver")
             # Iniciar monitoramento
             self.observer.start()
             logger.info(f"✅ Monitoramento de arquivos iniciado na pasta {app_config.VIDEO_DIR}")
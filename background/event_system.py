@@ -3,9 +3,13 @@ Sistema de eventos interno para alertas de câmeras
 Implementa Publisher/Subscriber pattern para desacoplamento
 """
 import asyncio
+import itertools
 import logging
+import threading
+import time
+from collections import deque
 from datetime import datetime
-from typing import Dict, List, Callable, Any, Optional
+from typing import Deque, Dict, List, Callable, Any, Optional, Tuple
 from dataclasses import dataclass
 from enum import Enum
 from models import Camera
@@ -15,6 +19,16 @@ import uuid
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# IDs de evento: prefixo aleatório por processo + contador monotônico.
+# Evita a syscall de uuid4() por evento mantendo unicidade entre reinícios.
+_EVENT_ID_PREFIX = uuid.uuid4().hex[:8]
+_event_id_counter = itertools.count()
+
+
+def _next_event_id() -> str:
+    """Gera o próximo ID de evento"""
+    return f"{_EVENT_ID_PREFIX}-{next(_event_id_counter)}"
+
 class EventType(Enum):
     """Tipos de eventos do sistema"""
     CAMERA_ALERT_DETECTED = "camera_alert_detected"
@@ -41,6 +55,8 @@ class AlertEvent:
     metadata: Dict[str, Any]
     image_path: Optional[str] = None
     video_clip_path: Optional[str] = None
+    # Sufixo de roteamento "camera.{id}.type.{code}", montado uma vez na criação
+    routing_suffix: Optional[str] = None
 
 @dataclass
 class CameraStatusEvent:
@@ -80,25 +96,35 @@ class EventBus:
     """
     
     def __init__(self):
-        self._subscribers: Dict[EventType, List[Callable]] = {}
-        self._event_history: List[Dict] = []
+        # Copy-on-write: cada subscribe/unsubscribe substitui a tupla inteira,
+        # então publish lê sem lock. Cada entrada é (is_coroutine, handler),
+        # classificada uma única vez no subscribe
+        self._subscribers: Dict[EventType, Tuple[Tuple[bool, Callable], ...]] = {}
         self._max_history = 1000
-        self._lock = asyncio.Lock()
+        # deque com maxlen descarta os mais antigos sozinho; append é atômico sob o GIL.
+        # Cada entrada guarda só (event_id, event_type, monotonic) para não reter
+        # objetos pesados do evento (Camera ORM, metadata)
+        self._event_history: Deque[Tuple[str, str, float]] = deque(maxlen=self._max_history)
+        # Referência para converter monotonic em horário UTC apenas na leitura
+        self._epoch_offset = time.time() - time.monotonic()
+        # Lock usado apenas em subscribe/unsubscribe (operações raras)
+        self._lock = threading.Lock()
         
     async def subscribe(self, event_type: EventType, handler: Callable):
         """Registra um handler para um tipo de evento"""
-        async with self._lock:
-            if event_type not in self._subscribers:
-                self._subscribers[event_type] = []
-            self._subscribers[event_type].append(handler)
+        entry = (asyncio.iscoroutinefunction(handler), handler)
+        with self._lock:
+            self._subscribers[event_type] = self._subscribers.get(event_type, ()) + (entry,)
             logger.info(f"Handler {handler.__name__} registrado para evento {event_type.value}")
     
     async def unsubscribe(self, event_type: EventType, handler: Callable):
         """Remove um handler de um tipo de evento"""
-        async with self._lock:
+        with self._lock:
             if event_type in self._subscribers:
+                handlers = self._subscribers[event_type]
                 try:
-                    self._subscribers[event_type].remove(handler)
+                    index = [registered for _, registered in handlers].index(handler)
+                    self._subscribers[event_type] = handlers[:index] + handlers[index + 1:]
                     logger.info(f"Handler {handler.__name__} removido do evento {event_type.value}")
                 except ValueError:
                     logger.warning(f"Handler {handler.__name__} não encontrado para evento {event_type.value}")
@@ -107,11 +133,11 @@ class EventBus:
         """Publica um evento para todos os subscribers"""
         event_type = event.event_type
         
-        # Adicionar ao histórico
-        await self._add_to_history(event)
+        # Adicionar ao histórico (sem lock no caminho quente)
+        self._add_to_history(event)
         
         # Buscar handlers
-        handlers = self._subscribers.get(event_type, [])
+        handlers = self._subscribers.get(event_type, ())
         
         if not handlers:
             logger.warning(f"Nenhum handler encontrado para evento {event_type.value}")
@@ -119,60 +145,88 @@ class EventBus:
         
         logger.info(f"Publicando evento {event_type.value} para {len(handlers)} handlers")
         
-        # Executar handlers em paralelo
-        tasks = []
-        for handler in handlers:
-            task = asyncio.create_task(self._safe_call_handler(handler, event))
-            tasks.append(task)
+        # Caminho rápido: um único handler assíncrono é aguardado diretamente, sem gather
+        if len(handlers) == 1 and handlers[0][0]:
+            handler = handlers[0][1]
+            try:
+                await handler(event)
+                logger.debug(f"Handler {handler.__name__} executado com sucesso")
+            except Exception as e:
+                logger.error(f"Erro no handler {handler.__name__}: {e}")
+            return
+        
+        # Em debug, reportar cada handler assim que termina: handlers lentos não atrasam o log dos rápidos
+        if logger.isEnabledFor(logging.DEBUG):
+            await self._run_handlers_as_completed(handlers, event)
+            return
         
-        # Aguardar todos os handlers
-        if tasks:
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-            
-            # Log de resultados
-            for i, result in enumerate(results):
-                handler_name = handlers[i].__name__
-                if isinstance(result, Exception):
-                    logger.error(f"Erro no handler {handler_name}: {result}")
+        # Executar handlers em paralelo (gather agenda as corrotinas diretamente)
+        coros = [self._safe_call_handler(is_coro, handler, event) for is_coro, handler in handlers]
+        results = await asyncio.gather(*coros, return_exceptions=True)
+        
+        # Log de resultados
+        for i, result in enumerate(results):
+            handler_name = handlers[i][1].__name__
+            if isinstance(result, Exception):
+                logger.error(f"Erro no handler {handler_name}: {result}")
+            else:
+                logger.debug(f"Handler {handler_name} executado com sucesso")
+    
+    async def _run_handlers_as_completed(self, handlers: Tuple[Tuple[bool, Callable], ...], event: AlertEvent | CameraStatusEvent | NewVideoFileEvent | TriggerDetectionEvent):
+        """Executa handlers em paralelo registrando o resultado de cada um na ordem de conclusão"""
+        pending = {
+            asyncio.create_task(self._safe_call_handler(is_coro, handler, event), name=handler.__name__)
+            for is_coro, handler in handlers
+        }
+        
+        # asyncio.wait devolve as próprias tasks, preservando o nome do handler no log
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                handler_name = task.get_name()
+                if task.cancelled():
+                    logger.warning(f"Handler {handler_name} cancelado")
+                    continue
+                error = task.exception()
+                if error is not None:
+                    logger.error(f"Erro no handler {handler_name}: {error}")
                 else:
                     logger.debug(f"Handler {handler_name} executado com sucesso")
     
-    async def _safe_call_handler(self, handler: Callable, event: AlertEvent | CameraStatusEvent | NewVideoFileEvent | TriggerDetectionEvent):
+    async def _safe_call_handler(self, is_coro: bool, handler: Callable, event: AlertEvent | CameraStatusEvent | NewVideoFileEvent | TriggerDetectionEvent):
         """Executa handler com tratamento de erro"""
         try:
-            if asyncio.iscoroutinefunction(handler):
+            if is_coro:
                 await handler(event)
             else:
                 # Executar função síncrona em thread pool
-                loop = asyncio.get_event_loop()
+                loop = asyncio.get_running_loop()
                 await loop.run_in_executor(None, handler, event)
         except Exception as e:
             logger.error(f"Erro no handler {handler.__name__}: {e}")
             raise
     
-    async def _add_to_history(self, event: AlertEvent | CameraStatusEvent | NewVideoFileEvent | TriggerDetectionEvent):
+    def _add_to_history(self, event: AlertEvent | CameraStatusEvent | NewVideoFileEvent | TriggerDetectionEvent):
         """Adiciona evento ao histórico"""
-        async with self._lock:
-            event_dict = {
-                "event_id": event.event_id,
-                "event_type": event.event_type.value,
-                "timestamp": datetime.utcnow().isoformat(),
-                "data": event.__dict__ if hasattr(event, '__dict__') else str(event)
-            }
-            
-            self._event_history.append(event_dict)
-            
-            # Manter apenas os últimos N eventos
-            if len(self._event_history) > self._max_history:
-                self._event_history = self._event_history[-self._max_history:]
+        # deque(maxlen) mantém apenas os últimos N eventos
+        self._event_history.append((event.event_id, event.event_type.value, time.monotonic()))
     
     def get_event_history(self, limit: int = 100) -> List[Dict]:
         """Retorna histórico de eventos"""
-        return self._event_history[-limit:]
+        return [
+            {
+                "event_id": event_id,
+                "event_type": event_type,
+                "timestamp": datetime.utcfromtimestamp(self._epoch_offset + monotonic_ts).isoformat()
+            }
+            for event_id, event_type, monotonic_ts in itertools.islice(
+                self._event_history, max(0, len(self._event_history) - limit), None
+            )
+        ]
     
     def get_subscriber_count(self, event_type: EventType) -> int:
         """Retorna número de subscribers para um evento"""
-        return len(self._subscribers.get(event_type, []))
+        return len(self._subscribers.get(event_type, ()))
 
 # Instância global do event bus
 event_bus = EventBus()
@@ -192,7 +246,7 @@ def create_alert_event(
 ) -> AlertEvent:
     """Factory function para criar eventos de alerta"""
     return AlertEvent(
-        event_id=str(uuid.uuid4()),
+        event_id=_next_event_id(),
         event_type=EventType.CAMERA_ALERT_DETECTED,
         camera_id=camera_id,
         camera_name=camera_name,
@@ -205,7 +259,8 @@ def create_alert_event(
         detected_at=datetime.utcnow(),
         metadata=metadata,
         image_path=image_path,
-        video_clip_path=video_clip_path
+        video_clip_path=video_clip_path,
+        routing_suffix=f"camera.{camera_id}.type.{alert_type_code}"
     )
 
 def create_camera_status_event(
@@ -216,7 +271,7 @@ def create_camera_status_event(
 ) -> CameraStatusEvent:
     """Factory function para criar eventos de status"""
     return CameraStatusEvent(
-        event_id=str(uuid.uuid4()),
+        event_id=_next_event_id(),
         event_type=EventType.CAMERA_PROCESSING_STARTED if status == "started" else EventType.CAMERA_PROCESSING_STOPPED,
         camera_id=camera_id,
         camera_name=camera_name,
@@ -231,7 +286,7 @@ def create_new_video_file_event(
 ) -> NewVideoFileEvent:
     """Factory function para criar eventos de novo arquivo de vídeo"""
     return NewVideoFileEvent(
-        event_id=str(uuid.uuid4()),
+        event_id=_next_event_id(),
         event_type=EventType.NEW_VIDEO_FILE,
         file_path=file_path,
         timestamp=datetime.utcnow(),
@@ -242,7 +297,7 @@ def create_new_video_file_event(
 def create_trigger_detection_event(video_event: NewVideoFileEvent) -> TriggerDetectionEvent:
     """Factory function para criar eventos de detecção acionada"""
     return TriggerDetectionEvent(
-        event_id=str(uuid.uuid4()),
+        event_id=_next_event_id(),
         event_type=EventType.TRIGGER_DETECTION,
         file_path=video_event.file_path,
         timestamp=video_event.timestamp,
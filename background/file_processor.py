@@ -3,6 +3,7 @@ Processamento de novos arquivos de vídeo
 """
 
 from datetime import datetime
+import asyncio
 import logging
 import os
 import time
@@ -14,13 +15,98 @@ import cv2
 
 logger = logging.getLogger(__name__)
 
+# Opções repassadas pelo OpenCV ao FFmpeg na abertura dos vídeos (formato "chave;valor|chave;valor").
+# Definido antes de qualquer VideoCapture; um valor já presente no ambiente tem prioridade
+# (ex.: "video_codec;h264_cuvid" em hosts NVIDIA).
+os.environ.setdefault("OPENCV_FFMPEG_CAPTURE_OPTIONS", "threads;auto")
+
+# Eventos IN_CLOSE_WRITE (via watchdog/inotify): arquivos já fechados pelo escritor
+# e corrotinas aguardando o fechamento. Acessados apenas na thread do event loop.
+_CLOSED_FILES_TTL = 600  # segundos
+_CLOSED_FILES_MAX_SIZE = 256
+_closed_files: Dict[str, float] = {}
+_close_waiters: Dict[str, asyncio.Future] = {}
+_close_events_supported = False
+
+
+def open_video_capture(video_path: str) -> cv2.VideoCapture:
+    """Abre o vídeo via FFmpeg solicitando decodificação por hardware e multithread quando disponível"""
+    cap = cv2.VideoCapture(
+        video_path,
+        cv2.CAP_FFMPEG,
+        [
+            cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY,
+            cv2.CAP_PROP_N_THREADS, os.cpu_count() or 1
+        ]
+    )
+    if not cap.isOpened():
+        # Fallback para o backend padrão (ex.: OpenCV sem FFmpeg)
+        cap = cv2.VideoCapture(video_path)
+    elif int(cap.get(cv2.CAP_PROP_HW_ACCELERATION)) == cv2.VIDEO_ACCELERATION_NONE:
+        logger.debug(f"🖥️ Decodificação por software (sem aceleração de hardware disponível): {video_path}")
+    else:
+        logger.debug(f"⚡ Decodificação acelerada por hardware (tipo {int(cap.get(cv2.CAP_PROP_HW_ACCELERATION))}): {video_path}")
+    return cap
+
+
+def set_close_events_supported(supported: bool):
+    """Indica se o observador de arquivos entrega eventos de fechamento (inotify)"""
+    global _close_events_supported
+    _close_events_supported = supported
+
+
+def notify_file_closed(file_path: str, loop: asyncio.AbstractEventLoop):
+    """Sinaliza que o arquivo foi fechado para escrita (chamado da thread do watchdog)"""
+    loop.call_soon_threadsafe(_mark_file_closed, file_path)
+
+
+def _mark_file_closed(file_path: str):
+    """Registra o fechamento e acorda quem estiver aguardando o arquivo"""
+    now = time.monotonic()
+    if file_path not in _closed_files and len(_closed_files) >= _CLOSED_FILES_MAX_SIZE:
+        _closed_files.pop(next(iter(_closed_files)), None)
+    _closed_files[file_path] = now
+    
+    waiter = _close_waiters.pop(file_path, None)
+    if waiter and not waiter.done():
+        waiter.set_result(True)
+
+
+async def wait_for_file_complete_async(file_path: str, max_wait: int = 30) -> bool:
+    """Aguarda arquivo estar completamente escrito sem bloquear o event loop"""
+    closed_at = _closed_files.get(file_path)
+    if closed_at is not None and time.monotonic() - closed_at < _CLOSED_FILES_TTL:
+        return True
+    
+    loop = asyncio.get_running_loop()
+    if not _close_events_supported:
+        # Sem inotify: polling de tamanho em thread separada
+        return await loop.run_in_executor(None, wait_for_file_complete, file_path, max_wait)
+    
+    # Kernel acorda a corrotina assim que o escritor fecha o arquivo
+    waiter = _close_waiters.get(file_path)
+    if waiter is None:
+        waiter = loop.create_future()
+        _close_waiters[file_path] = waiter
+    try:
+        return await asyncio.wait_for(asyncio.shield(waiter), max_wait)
+    except asyncio.TimeoutError:
+        # Evento de fechamento perdido (ex.: arquivo fechado antes da watch existir):
+        # recorrer ao polling de tamanho
+        _close_waiters.pop(file_path, None)
+        return await loop.run_in_executor(None, wait_for_file_complete, file_path, max_wait)
+
 async def process_new_video(video_path: str):
     """Processa novo arquivo de vídeo"""
     try:
         logger.info(f"Processando novo vídeo: {video_path}")
         
+        if not await wait_for_file_complete_async(video_path):
+            logger.error(f"Arquivo não ficou completo: {video_path}")
+            return
+        
         # Obter informações do vídeo
-        video_info = get_video_info(video_path)
+        video_info = await get_video_info(video_path)
         # TODO: validar se o vídeo já foi processado no banco
         # Enviar um evento de novo arquivo de vídeo
         metadata = {
@@ -59,15 +145,17 @@ def wait_for_file_complete(file_path: str, max_wait: int = 30) -> bool:
         
         return False
 
-def get_video_info(video_path: str) -> Dict:
+async def get_video_info(video_path: str) -> Dict:
+    """Extrai informações básicas do vídeo sem bloquear o event loop"""
+    # Abrir o container com OpenCV (parse do moov atom) pode levar dezenas de ms
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, _get_video_info_sync, video_path)
+
+def _get_video_info_sync(video_path: str) -> Dict:
     """Extrai informações básicas do vídeo"""
     try:
         cap = cv2.VideoCapture(video_path)
         
-        if not wait_for_file_complete(video_path):
-            logger.error(f"Arquivo não ficou completo: {video_path}")
-            return False
-        
         if not cap.isOpened():
             raise Exception(f"Não foi possível abrir o vídeo: {video_path}")
         
@@ -4,18 +4,41 @@ Handler Database - Salva alertas no banco de dados quando são detectados
 import asyncio
 import json
 import logging
+import time
 from datetime import datetime
 from typing import Dict, Any, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
-from sqlalchemy import select, update
+from sqlalchemy import exists, select, update
 
 from ..event_system import AlertEvent, EventType
 from models import Camera, CameraAlert, AlertType
 from config import get_db_session
+from services.alert_stats_service import increment_alert_counter
 
 logger = logging.getLogger(__name__)
 
+# Cache de IDs já validados no banco (ID -> instante da validação).
+# Câmeras e tipos de alerta mudam raramente, então evitamos o SELECT a cada alerta.
+_VALIDATION_CACHE_TTL = 60  # segundos
+_VALIDATION_CACHE_MAX_SIZE = 256
+_camera_cache: Dict[int, float] = {}
+_alert_type_cache: Dict[int, float] = {}
+
+
+def _is_cached(cache: Dict[int, float], key: int, now: float) -> bool:
+    """Verifica se o ID foi validado dentro do TTL"""
+    validated_at = cache.get(key)
+    return validated_at is not None and now - validated_at < _VALIDATION_CACHE_TTL
+
+
+def _remember(cache: Dict[int, float], key: int, now: float):
+    """Registra ID validado, descartando a entrada mais antiga quando o cache está cheio"""
+    if key not in cache and len(cache) >= _VALIDATION_CACHE_MAX_SIZE:
+        cache.pop(next(iter(cache)), None)
+    cache[key] = now
+
+
 class DatabaseHandler:
     """Handler para salvar alertas no banco de dados"""
     
@@ -42,20 +65,32 @@ class DatabaseHandler:
     
     async def handle_event(self, event: AlertEvent) -> bool:
         """Processa evento de alerta salvando no banco de dados"""
+        # Sessão síncrona roda em thread para não bloquear o event loop durante o I/O do banco
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._save_alert, event)
+    
+    def _save_alert(self, event: AlertEvent) -> bool:
+        """Salva o alerta no banco de dados (executado em thread separada)"""
         try:
             with get_db_session() as db:
                 try:
-                    # Validar se a câmera existe
-                    camera = db.query(Camera).filter(Camera.id == event.camera_id).first()
-                    if not camera:
-                        logger.warning(f"Câmera {event.camera_id} não encontrada no banco")
-                        return False
-                    
-                    # Validar se o tipo de alerta existe
-                    alert_type = db.query(AlertType).filter(AlertType.id == event.alert_type_id).first()
-                    if not alert_type:
-                        logger.warning(f"Tipo de alerta {event.alert_type_id} não encontrado no banco")
-                        return False
+                    # Validar câmera e tipo de alerta em uma única consulta (ou pelo cache)
+                    now = time.monotonic()
+                    if not (_is_cached(_camera_cache, event.camera_id, now)
+                            and _is_cached(_alert_type_cache, event.alert_type_id, now)):
+                        camera_exists, alert_type_exists = db.query(
+                            exists().where(Camera.id == event.camera_id),
+                            exists().where(AlertType.id == event.alert_type_id)
+                        ).one()
+                        if not camera_exists:
+                            logger.warning(f"Câmera {event.camera_id} não encontrada no banco")
+                            return False
+                        if not alert_type_exists:
+                            logger.warning(f"Tipo de alerta {event.alert_type_id} não encontrado no banco")
+                            return False
+                        
+                        _remember(_camera_cache, event.camera_id, now)
+                        _remember(_alert_type_cache, event.alert_type_id, now)
                     
                     # Criar registro de alerta
                     camera_alert = CameraAlert(
@@ -66,17 +101,18 @@ class DatabaseHandler:
                         alert_metadata=event.metadata
                     )
                     
-                    # Salvar no banco
+                    # Salvar no banco (flush já atribui o ID, sem refresh extra)
                     db.add(camera_alert)
+                    db.flush()
+                    alert_id = camera_alert.id
+                    
+                    # Atualizar estatísticas da câmera em O(1) na mesma transação
+                    increment_alert_counter(db, event.camera_id, event.alert_type_code, event.detected_at)
                     db.commit()
-                    db.refresh(camera_alert)
                     
-                    logger.info(f"Alerta salvo no banco - ID: {camera_alert.id}, "
+                    logger.info(f"Alerta salvo no banco - ID: {alert_id}, "
                               f"Câmera: {event.camera_name}, Tipo: {event.alert_type_code}")
                     
-                    # Atualizar estatísticas da câmera (opcional)
-                    self._update_camera_stats(db, camera, event)
-                    
                     return True
                     
                 except Exception as e:
@@ -108,37 +144,3 @@ class DatabaseHandler:
                 "processing_metadata": event.metadata
             }
         }
-    
-    def _update_camera_stats(self, db, camera: Camera, event: AlertEvent):
-        """Atualiza estatísticas da câmera (opcional)"""
-        try:
-            # Calcular estatísticas simples
-            total_alerts = db.query(CameraAlert).filter(CameraAlert.camera_id == camera.id).count()
-            resolved_alerts = db.query(CameraAlert).filter(
-                CameraAlert.camera_id == camera.id,
-                CameraAlert.resolved == True
-            ).count()
-            
-            # Atualizar metadata da câmera com estatísticas
-            current_metadata = camera.metadata or {}
-            current_metadata.update({
-                "alert_stats": {
-                    "total_alerts": total_alerts,
-                    "resolved_alerts": resolved_alerts,
-                    "pending_alerts": total_alerts - resolved_alerts,
-                    "last_alert_at": datetime.utcnow().isoformat(),
-                    "last_alert_type": event.alert_type_code
-                },
-                "updated_at": datetime.utcnow().isoformat()
-            })
-            
-            # Atualizar no banco
-            camera.metadata = current_metadata
-            db.commit()
-            
-            logger.debug(f"Estatísticas da câmera {camera.id} atualizadas")
-            
-        except Exception as e:
-            logger.error(f"Erro ao atualizar estatísticas da câmera {camera.id}: {e}")
-            # Não falhar o handler por erro nas estatísticas
-            pass 
\ No newline at end of file
@@ -1,22 +1,156 @@
 import logging
+import math
 import time
 import asyncio
+import queue
 import threading
-from typing import Dict, List
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
 import cv2
+import importlib.util
 import os
 import numpy as np
+import torch
+from sqlalchemy import func
 from ultralytics import YOLO
+
+try:
+    from numba import njit
+except ImportError:  # numba é opcional: sem ele a seleção de frames usa NumPy puro
+    njit = None
+
 from ..event_system import TriggerDetectionEvent, event_bus, create_alert_event
+from ..file_processor import open_video_capture, wait_for_file_complete_async
 from config import app_config, get_db_session
-from models import CameraAlert, CameraType
+from models import AlertType, CameraAlert, CameraType
 
 
 logger = logging.getLogger(__name__)
 
+# Lacuna máxima (em frames) percorrida com grab() antes de preferir um seek
+MAX_GRAB_GAP_FRAMES = 120
+
+# Adversidades diretas: classe do modelo (MAIÚSCULAS) → código do alerta no banco
+CLASS_TO_ALERT = {
+    "FUMANDO_CIGARRO": "SMOKING",
+    "SEM_CINTO": "NO_SEAT_BELT",
+    "USANDO_CELULAR": "USING_CELL_PHONE",
+}
+
+# Regras de EPI: (classe de pessoa, classe do EPI esperado, alerta quando o EPI está ausente)
+PPE_CHECK = (
+    ("PESSOA", "COM_CAPACETE", "NO_HELMET"),
+    ("PESSOA", "COM_LUVA", "NO_GLOVES"),
+)
+
+# Tempo de vida do cache de tipos de alerta (configuração praticamente estática)
+ALERT_TYPE_CACHE_TTL = 300
+
+# Bit de cada classe do modelo usada nas regras de alerta (testes de presença por máscara)
+CLASS_BITS = {
+    model_class: 1 << index
+    for index, model_class in enumerate(
+        ("PESSOA", "COM_CAPACETE", "COM_LUVA", "FUMANDO_CIGARRO", "SEM_CINTO", "USANDO_CELULAR")
+    )
+}
+
+# Janela (em segundos) em torno de cada detecção do MediaPipe analisada pelo YOLO
+DETECTION_WINDOW_SECONDS = 1.0
+
+# Inferências com frame dummy para absorver a inicialização lazy (CUDA/cuDNN) no boot
+WARMUP_ITERATIONS = 3
+
+@dataclass(slots=True)
+class AlertTypeSnapshot:
+    """Campos de AlertType usados na publicação, desacoplados da sessão ORM"""
+    id: int
+    name: str
+    severity: str
+
+
+class AlertThresholdTracker:
+    """Consolida as contagens de todos os workers de um evento para detectar quando o resultado já está decidido.
+    
+    Um alerta está decidido quando já atingiu o threshold sobre os frames planejados ou quando
+    nem todos os frames restantes bastariam para atingi-lo. Em ambos os casos a decisão final
+    (contagem / frames processados >= threshold) não muda ao interromper a inferência.
+    """
+    
+    def __init__(self, alert_codes: List[str], total_planned: int, threshold: float):
+        self._lock = threading.Lock()
+        self._counts = Counter()
+        self._alert_codes = tuple(alert_codes)
+        self._total_planned = total_planned
+        self._required = max(1, math.ceil(threshold * total_planned))
+        self._frames_done = 0
+        self.decided = False
+    
+    def record(self, batch_counts: Counter, frames: int) -> bool:
+        """Registra um lote inferido e retorna True se todos os alertas monitorados já estão decididos"""
+        with self._lock:
+            self._counts.update(batch_counts)
+            self._frames_done += frames
+            remaining = max(0, self._total_planned - self._frames_done)
+            
+            self.decided = all(
+                self._counts[code] >= self._required or self._counts[code] + remaining < self._required
+                for code in self._alert_codes
+            )
+            return self.decided
+
+
+if njit is not None:
+    @njit(cache=True)
+    def _select_frames_kernel(total_frames, fps, det_times, window):
+        """Varredura linear (dois ponteiros) sobre frames e timestamps ordenados, compilada pelo numba"""
+        out = np.empty(total_frames, np.int64)
+        count = 0
+        j = 0
+        n = det_times.shape[0]
+        for i in range(total_frames):
+            t = i / fps
+            # Timestamps muito atrás deste frame também ficam atrás dos próximos
+            while j < n and t - det_times[j] > window:
+                j += 1
+            if j < n and abs(t - det_times[j]) <= window:
+                out[count] = i
+                count += 1
+        return out[:count]
+else:
+    _select_frames_kernel = None
+
+
+def select_frames_near_timestamps(total_frames: int, fps: float, timestamps, window: float = DETECTION_WINDOW_SECONDS) -> List[int]:
+    """Retorna os índices de frames a até `window` segundos de algum dos timestamps.
+    
+    Compara cada frame apenas com os vizinhos imediatos no array ordenado de
+    timestamps (np.searchsorted), em vez de percorrer todos os timestamps por frame.
+    Com numba instalado, usa o kernel compilado _select_frames_kernel.
+    """
+    if total_frames <= 0 or fps <= 0 or not timestamps:
+        return []
+    
+    det_times = np.sort(np.fromiter(timestamps, dtype=np.float64, count=len(timestamps)))
+    
+    if _select_frames_kernel is not None:
+        return _select_frames_kernel(total_frames, float(fps), det_times, float(window)).tolist()
+    
+    frame_times = np.arange(total_frames, dtype=np.float64) / fps
+    
+    # Distância ao timestamp imediatamente à direita e à esquerda de cada frame
+    right = np.searchsorted(det_times, frame_times)
+    last = len(det_times) - 1
+    nearest = np.minimum(
+        np.abs(frame_times - det_times[np.clip(right, 0, last)]),
+        np.abs(frame_times - det_times[np.clip(right - 1, 0, last)])
+    )
+    return np.flatnonzero(nearest <= window).tolist()
+
+
 class DetectionHandler:
     def __init__(self):
         self.is_initialized = False
@@ -25,29 +159,61 @@ class DetectionHandler:
         self.alert_cooldown_hours = app_config.ALERT_COOLDOWN_HOURS
         self.detection_threshold = app_config.DETECTION_THRESHOLD_PERCENT
         self.skip_frames = app_config.SKIP_FRAMES
-
-        # Pool de modelos reutilizáveis por tipo de câmera (thread-safe)
-        self._model_pools: Dict[str, List[YOLO]] = {}
-        self._model_lock = threading.Lock()
+        self.batch_size = max(1, app_config.YOLO_BATCH_SIZE)
+        self.imgsz = app_config.YOLO_IMGSZ
+        # Frame dummy compartilhado pelos aquecimentos, no formato que _resize_for_inference
+        # produz para câmeras 16:9: o letterbox gera o mesmo tensor de entrada (ex.: 384x640)
+        # dos eventos reais, e as alocações do aquecimento são reaproveitadas na primeira inferência
+        self._warmup_frame = np.zeros((round(self.imgsz * 9 / 16), self.imgsz, 3), dtype=np.uint8)
+        
+        # Cache de tipos de alerta (código → snapshot), renovado a cada ALERT_TYPE_CACHE_TTL segundos
+        self._alert_type_cache: Dict[str, AlertTypeSnapshot] = {}
+        self._alert_type_cache_ts = 0.0
+        self._alert_type_cache_lock = asyncio.Lock()
+        
+        # Inferência em FP16 apenas em GPU CUDA e com YOLO_HALF habilitado (em CPU mantém FP32)
+        self.use_half = app_config.YOLO_HALF and torch.cuda.is_available()
+        
+        # Executor de longa duração para os workers de inferência (evita criar um pool por evento)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="detection")
+        
+        # Pool de modelos reutilizáveis por tipo de câmera (queue.Queue: get/put O(1) e thread-safe)
+        self._model_pools: Dict[str, queue.Queue] = {}
         self._models_in_use = set()
+        # Tabelas ID de classe → bit de CLASS_BITS por modelo (id(model)), preenchidas sob demanda
+        self._class_bit_tables: Dict[int, np.ndarray] = {}
         
         # Carregar modelos principais para cada tipo de câmera
         self._main_models: Dict[str, YOLO] = {}
+        # Caminho efetivamente carregado por tipo (.pt ou .engine TensorRT)
+        self._model_paths: Dict[str, str] = {}
         
         try:
             logger.info("🚀 Carregando modelos YOLO para cada tipo de câmera...")
             for camera_type in CameraType:
                 model_path = app_config.YOLO_MODELS_BY_TYPE.get(camera_type.value)
                 if model_path:
+                    model_path = self._resolve_model_path(model_path)
+                    self._model_paths[camera_type.value] = model_path
                     logger.info(f"  📦 Carregando modelo para tipo '{camera_type.value}': {model_path}")
                     self._main_models[camera_type.value] = YOLO(model_path)
-                    self._model_pools[camera_type.value] = []
+                    self._model_pools[camera_type.value] = queue.Queue()
                     logger.info(f"  ✅ Modelo '{camera_type.value}' carregado com sucesso")
                 else:
                     logger.warning(f"  ⚠️  Modelo não configurado para tipo '{camera_type.value}'")
             
             logger.info(f"✅ Total de {len(self._main_models)} modelos carregados")
             
+            # Workers de inferência por tipo de câmera (mesmo tamanho do pool de modelos)
+            self._workers_per_type = max(1, self.max_workers // max(1, len(self._main_models)))
+            
+            # Em CPU, dividir os núcleos entre os workers: sem isso cada inferência usa todos os
+            # núcleos (OpenMP) e os max_workers threads disputam entre si
+            if not torch.cuda.is_available():
+                intra_op_threads = max(1, (os.cpu_count() or 1) // self.max_workers)
+                torch.set_num_threads(intra_op_threads)
+                logger.info(f"🧵 Inferência em CPU: {intra_op_threads} thread(s) por inferência para {self.max_workers} workers")
+            
             # Manter compatibilidade com código legado
             if CameraType.EXTERNAL.value in self._main_models:
                 self.model = self._main_models[CameraType.EXTERNAL.value]
@@ -56,6 +222,48 @@ class DetectionHandler:
             logger.error(f"❌ Erro ao carregar modelos YOLO: {e}")
             raise
 
+    def _resolve_model_path(self, model_path: str) -> str:
+        """Retorna o engine TensorRT do modelo, exportando-o na primeira execução.
+        
+        Só atua com YOLO_USE_TENSORRT habilitado, CUDA disponível e o pacote tensorrt
+        instalado; em qualquer outro caso (ou se a exportação falhar) mantém o .pt.
+        Com YOLO_TENSORRT_INT8 o engine é calibrado em INT8 sobre YOLO_TENSORRT_CALIBRATION_DATA.
+        """
+        if not app_config.YOLO_USE_TENSORRT or not model_path.endswith(".pt"):
+            return model_path
+        
+        if not torch.cuda.is_available() or importlib.util.find_spec("tensorrt") is None:
+            logger.warning(f"  ⚠️  TensorRT indisponível (requer CUDA e tensorrt), usando {model_path}")
+            return model_path
+        
+        engine_path = os.path.splitext(model_path)[0] + ".engine"
+        if os.path.exists(engine_path):
+            return engine_path
+        
+        # INT8 exige um dataset de calibração; sem ele mantém a precisão de YOLO_HALF
+        export_precision = {"half": app_config.YOLO_HALF}
+        if app_config.YOLO_TENSORRT_INT8:
+            if app_config.YOLO_TENSORRT_CALIBRATION_DATA:
+                export_precision = {"int8": True, "data": app_config.YOLO_TENSORRT_CALIBRATION_DATA}
+            else:
+                logger.warning("  ⚠️  YOLO_TENSORRT_INT8 requer YOLO_TENSORRT_CALIBRATION_DATA, ignorando INT8")
+
+        try:
+            logger.info(f"  🔧 Exportando {model_path} para TensorRT {'INT8' if 'int8' in export_precision else 'FP16' if app_config.YOLO_HALF else 'FP32'} (pode levar alguns minutos)...")
+            # Engine dinâmico com lote máximo = batch_size: aceita também o último lote parcial
+            exported_path = YOLO(model_path).export(
+                format="engine",
+                dynamic=True,
+                batch=self.batch_size,
+                imgsz=self.imgsz,
+                **export_precision
+            )
+            logger.info(f"  ✅ Engine TensorRT gerado: {exported_path}")
+            return str(exported_path)
+        except Exception as e:
+            logger.error(f"  ❌ Erro ao exportar {model_path} para TensorRT, usando .pt: {e}")
+            return model_path
+
     async def initialize(self):
         """Inicializa o handler de detecção com pré-carregamento de modelos"""
         if self.is_initialized:
@@ -66,6 +274,13 @@ class DetectionHandler:
         # Pré-carregar e aquecer modelos para todas as threads
         await self._preload_thread_models()
         
+        # Aquecer modelos principais (usados como fallback quando o pool esvazia)
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(self._executor, self._warmup_main_models)
+        
+        # Carregar o cache de tipos de alerta antes do primeiro evento
+        await self._get_alert_types()
+        
         self.is_initialized = True
         logger.info("✅ Detection Handler inicializado com modelos pré-carregados")
     
@@ -76,37 +291,36 @@ class DetectionHandler:
             start_time = time.time()
             
             # Calcular workers por tipo (distribuir igualmente)
-            workers_per_type = max(1, self.max_workers // len(self._main_models))
+            workers_per_type = self._workers_per_type
             
-            # Usar ThreadPoolExecutor para carregar modelos em paralelo
+            # Usar o executor do handler para carregar modelos em paralelo
             loop = asyncio.get_event_loop()
             all_futures = []
             
-            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-                for camera_type in self._main_models.keys():
-                    logger.info(f"  🔄 Pré-carregando {workers_per_type} modelos para tipo '{camera_type}'")
-                    # Criar tasks para carregar modelos para este tipo
-                    futures = [
-                        loop.run_in_executor(
-                            executor, 
-                            self._load_and_warm_model, 
-                            camera_type,
-                            i+1
-                        )
-                        for i in range(workers_per_type)
-                    ]
-                    all_futures.extend(futures)
-                
-                # Aguardar todos os modelos serem carregados
-                results = await asyncio.gather(*all_futures)
-                
+            for camera_type in self._main_models.keys():
+                logger.info(f"  🔄 Pré-carregando {workers_per_type} modelos para tipo '{camera_type}'")
+                # Criar tasks para carregar modelos para este tipo
+                futures = [
+                    loop.run_in_executor(
+                        self._executor, 
+                        self._load_and_warm_model, 
+                        camera_type,
+                        i+1
+                    )
+                    for i in range(workers_per_type)
+                ]
+                all_futures.extend(futures)
+            
+            # Aguardar todos os modelos serem carregados
+            results = await asyncio.gather(*all_futures)
+            
             total_time = time.time() - start_time
             successful_loads = sum(1 for r in results if r != -1)
             logger.info(f"✅ {successful_loads}/{len(results)} modelos pré-carregados e aquecidos em {total_time:.2f}s")
             
             # Log de estatísticas por tipo
             for camera_type, pool in self._model_pools.items():
-                logger.info(f"  📊 Tipo '{camera_type}': {len(pool)} modelos no pool")
+                logger.info(f"  📊 Tipo '{camera_type}': {pool.qsize()} modelos no pool")
             
         except Exception as e:
             logger.error(f"❌ Erro no pré-carregamento: {e}")
@@ -120,7 +334,7 @@ class DetectionHandler:
             load_start = time.time()
             
             # Obter caminho do modelo para este tipo
-            model_path = app_config.YOLO_MODELS_BY_TYPE.get(camera_type)
+            model_path = self._model_paths.get(camera_type)
             if not model_path:
                 logger.error(f"❌ Worker {worker_id} [{camera_type}]: Modelo não configurado")
                 return -1
@@ -129,15 +343,13 @@ class DetectionHandler:
             model = YOLO(model_path)
             
             # Aquecer modelo com frame dummy
-            dummy_frame = np.zeros((480, 640, 3), dtype=np.uint8)
-            _ = model(dummy_frame, conf=0.5, verbose=False)
+            self._warm_model(model)
             
             # Adicionar ao pool thread-safe
-            with self._model_lock:
-                self._model_pools[camera_type].append(model)
+            self._model_pools[camera_type].put(model)
             
             load_time = time.time() - load_start
-            logger.info(f"✅ Worker {worker_id} [{camera_type}]: Modelo carregado e aquecido em {load_time:.2f}s (pool: {len(self._model_pools[camera_type])})")
+            logger.info(f"✅ Worker {worker_id} [{camera_type}]: Modelo carregado e aquecido em {load_time:.2f}s (pool: {self._model_pools[camera_type].qsize()})")
             
             return worker_id
             
@@ -145,50 +357,78 @@ class DetectionHandler:
             logger.error(f"❌ Worker {worker_id} [{camera_type}]: Erro ao carregar modelo - {e}")
             return -1
     
+    def _warm_model(self, model: YOLO):
+        """Executa inferências dummy no formato de frame único e de lote usados no processamento"""
+        for _ in range(WARMUP_ITERATIONS):
+            _ = model(self._warmup_frame, conf=0.5, imgsz=self.imgsz, half=self.use_half, verbose=False)
+        _ = model([self._warmup_frame] * self.batch_size, conf=0.5, imgsz=self.imgsz, half=self.use_half, verbose=False)
+        
+        if torch.cuda.is_available():
+            torch.cuda.synchronize()
+    
+    def _warmup_main_models(self):
+        """Aquece os modelos principais de cada tipo de câmera"""
+        for camera_type, model in self._main_models.items():
+            try:
+                warmup_start = time.time()
+                self._warm_model(model)
+                logger.info(f"🔥 Modelo principal '{camera_type}' aquecido em {time.time() - warmup_start:.2f}s")
+            except Exception as e:
+                logger.error(f"❌ Erro ao aquecer modelo principal '{camera_type}': {e}")
+    
     def get_thread_model(self, camera_type: str, batch_id: int = 0) -> YOLO:
         """Obtém modelo YOLO do pool pré-carregado para o tipo de câmera especificado (thread-safe)"""
-        with self._model_lock:
-            # Tentar obter modelo do pool para este tipo
-            if camera_type in self._model_pools and self._model_pools[camera_type]:
-                model = self._model_pools[camera_type].pop(0)
-                logger.debug(f"⚡ [Lote {batch_id}] [{camera_type}] Usando modelo do pool (restam: {len(self._model_pools[camera_type])})")
+        # Tentar obter modelo do pool para este tipo
+        pool = self._model_pools.get(camera_type)
+        if pool is not None:
+            try:
+                model = pool.get_nowait()
+                logger.debug(f"⚡ [Lote {batch_id}] [{camera_type}] Usando modelo do pool (restam: {pool.qsize()})")
                 return model
-            else:
-                # Fallback: usar modelo principal deste tipo (pode causar contenção)
-                if camera_type in self._main_models:
-                    logger.warning(f"🔄 [Lote {batch_id}] [{camera_type}] Pool vazio, usando modelo principal")
-                    return self._main_models[camera_type]
-                else:
-                    # Se tipo não existe, usar modelo external como fallback
-                    logger.error(f"❌ [Lote {batch_id}] [{camera_type}] Tipo não configurado, usando fallback")
-                    return self._main_models.get(CameraType.EXTERNAL.value, self.model)
+            except queue.Empty:
+                pass
+        
+        # Fallback: usar modelo principal deste tipo (pode causar contenção)
+        if camera_type in self._main_models:
+            logger.warning(f"🔄 [Lote {batch_id}] [{camera_type}] Pool vazio, usando modelo principal")
+            return self._main_models[camera_type]
+        else:
+            # Se tipo não existe, usar modelo external como fallback
+            logger.error(f"❌ [Lote {batch_id}] [{camera_type}] Tipo não configurado, usando fallback")
+            return self._main_models.get(CameraType.EXTERNAL.value, self.model)
     
     def return_thread_model(self, model: YOLO, camera_type: str, batch_id: int = 0):
         """Retorna modelo para o pool após uso"""
         # Verificar se não é o modelo principal (não devolver modelo principal ao pool)
         if camera_type in self._main_models and model != self._main_models[camera_type]:
-            with self._model_lock:
-                if camera_type in self._model_pools:
-                    self._model_pools[camera_type].append(model)
-                    logger.debug(f"♻️ [Lote {batch_id}] [{camera_type}] Modelo retornado ao pool (total: {len(self._model_pools[camera_type])})")
+            pool = self._model_pools.get(camera_type)
+            if pool is not None:
+                pool.put_nowait(model)
+                logger.debug(f"♻️ [Lote {batch_id}] [{camera_type}] Modelo retornado ao pool (total: {pool.qsize()})")
 
     async def cleanup(self):
         """Limpa recursos do handler incluindo modelos pré-carregados"""
         try:
             logger.info("🧹 Limpando recursos do Detection Handler...")
             
-            with self._model_lock:
-                total_models = 0
-                for camera_type, pool in self._model_pools.items():
-                    num_models = len(pool)
-                    total_models += num_models
-                    pool.clear()
-                    logger.info(f"  🗑️  Tipo '{camera_type}': {num_models} modelos removidos")
-                
-                self._model_pools.clear()
-                self._main_models.clear()
-                self._models_in_use.clear()
-                logger.info(f"✅ {total_models} modelos do pool removidos da memória")
+            total_models = 0
+            for camera_type, pool in self._model_pools.items():
+                num_models = 0
+                while True:
+                    try:
+                        pool.get_nowait()
+                    except queue.Empty:
+                        break
+                    num_models += 1
+                total_models += num_models
+                logger.info(f"  🗑️  Tipo '{camera_type}': {num_models} modelos removidos")
+            
+            self._model_pools.clear()
+            self._main_models.clear()
+            self._models_in_use.clear()
+            logger.info(f"✅ {total_models} modelos do pool removidos da memória")
+            
+            self._executor.shutdown(wait=False)
             
             logger.info("🧹 Detection Handler finalizado")
         except Exception as e:
@@ -204,7 +444,12 @@ class DetectionHandler:
                 logger.info(f"Câmera {event.camera.name} não está ativa. Evento ignorado.")
                 return False
             
-            if not self.wait_for_file_complete(event.file_path):
+            # Sem nenhum alerta habilitado coberto pelas regras do YOLO não há o que analisar no vídeo
+            if not self._alert_rules(event.camera.enabled_alerts or []):
+                logger.info(f"Câmera {event.camera.name} sem alertas de detecção habilitados. Evento ignorado.")
+                return False
+            
+            if not await wait_for_file_complete_async(event.file_path):
                 logger.error(f"Arquivo não ficou completo: {event.file_path}")
                 return False
                 
@@ -222,27 +467,6 @@ class DetectionHandler:
             logger.error(f"Erro ao processar evento de detecção: {e}")
             return False
         
-    def wait_for_file_complete(self, file_path: str, max_wait: int = 30) -> bool:
-        """Aguarda arquivo estar completamente escrito"""
-        start_time = time.time()
-        last_size = 0
-        
-        while time.time() - start_time < max_wait:
-            if not os.path.exists(file_path):
-                time.sleep(1)
-                continue
-                
-            current_size = os.path.getsize(file_path)
-            if current_size > 0 and current_size == last_size:
-                # Arquivo parou de crescer, assumir que está completo
-                time.sleep(2)  # Aguardar mais 2 segundos para garantir
-                return True
-                
-            last_size = current_size
-            time.sleep(1)
-        
-        return False
-        
     async def process_video_parallel(self, event: TriggerDetectionEvent) -> Dict[str, int]:
         """Processa vídeo de forma paralela usando múltiplos cores"""
         try:
@@ -259,69 +483,85 @@ class DetectionHandler:
             detection_timestamps = {detection["timestamp"] for detection in mediapipe_detections}
             logger.info(f"Processando {len(detection_timestamps)} timestamps com detecção de pessoa")
             
-            # Abrir vídeo para obter informações
-            cap = cv2.VideoCapture(event.file_path)
+            # Abrir vídeo uma única vez: o mesmo handle é repassado ao leitor de frames
+            loop = asyncio.get_event_loop()
+            cap = await loop.run_in_executor(self._executor, open_video_capture, event.file_path)
             if not cap.isOpened():
                 raise Exception(f"Não foi possível abrir o vídeo: {event.file_path}")
             
-            fps = cap.get(cv2.CAP_PROP_FPS)
-            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            cap.release()
-            
-            # Preparar tarefas de processamento paralelo
-            frame_indices = []
-            
-            for frame_idx in range(total_frames):
-                timestamp = frame_idx / fps
+            try:
+                fps = cap.get(cv2.CAP_PROP_FPS)
+                total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+                
                 # Processar apenas frames onde MediaPipe detectou pessoa (±1 segundo)
-                if any(abs(timestamp - det_time) <= 1.0 for det_time in detection_timestamps):
-                    frame_indices.append(frame_idx)
-            
-            logger.info(f"Processando {len(frame_indices)} frames de {total_frames} total ({len(frame_indices)/total_frames*100:.1f}%)")
-            
-            # Dividir frames em lotes para processamento paralelo
-            batch_size = max(1, len(frame_indices) // self.max_workers)
-            batches = [frame_indices[i:i + batch_size] for i in range(0, len(frame_indices), batch_size)]
-            
-            logger.info(f"📦 Dividindo em {len(batches)} lotes (batch_size={batch_size}, max_workers={self.max_workers})")
-            for i, batch in enumerate(batches):
-                logger.info(f"  Lote {i+1}: frames {batch[0]}-{batch[-1]} ({len(batch)} frames)")
-            
-            # Executar processamento paralelo
-            loop = asyncio.get_event_loop()
-            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-                logger.info(f"🚀 Iniciando {len(batches)} workers paralelos...")
+                frame_indices = select_frames_near_timestamps(total_frames, fps, detection_timestamps)
+                
+                logger.info(f"Processando {len(frame_indices)} frames de {total_frames} total ({len(frame_indices)/total_frames*100:.1f}%)")
+                
+                # Apenas 1 a cada skip_frames frames selecionados é analisado
+                target_indices = frame_indices[::self.skip_frames]
+            except Exception:
+                cap.release()
+                raise
+            
+            batch_results = []
+            tracker = None
+            if not target_indices:
+                cap.release()
+            else:
+                # Um único leitor decodifica o vídeo sequencialmente; os workers de inferência
+                # consomem os frames da fila limitada em lotes de batch_size
+                num_workers = min(self._workers_per_type, -(-len(target_indices) // self.batch_size))
+                frame_queue = queue.Queue(maxsize=self.batch_size * 2)
+                stop_event = threading.Event()
+                
+                # Permite encerrar a inferência assim que todos os alertas estiverem decididos
+                tracker = AlertThresholdTracker(
+                    [alert_code for _, _, alert_code in self._alert_rules(event.camera.enabled_alerts)],
+                    len(target_indices),
+                    self.detection_threshold
+                )
+                
+                reader = threading.Thread(
+                    target=self._read_frames,
+                    args=(cap, target_indices, frame_queue, stop_event, num_workers),
+                    name="detection-reader",
+                    daemon=True
+                )
+                reader.start()
+                
+                logger.info(f"🚀 Iniciando leitor sequencial e {num_workers} workers de inferência (batch_size={self.batch_size})...")
                 
                 futures = [
                     loop.run_in_executor(
-                        executor, 
-                        self.process_frame_batch, 
-                        event.file_path, 
-                        batch, 
-                        fps,
+                        self._executor,
+                        self.process_frame_batch,
+                        frame_queue,
+                        stop_event,
+                        tracker,
                         event.camera.enabled_alerts,
                         event.camera.camera_type.value,  # Tipo da câmera
                         i+1  # batch_id para logs
-                    ) 
-                    for i, batch in enumerate(batches)
+                    )
+                    for i in range(num_workers)
                 ]
                 
-                logger.info("⏳ Aguardando conclusão dos lotes...")
-                # Aguardar todos os lotes terminarem com progress
-                batch_results = []
-                for i, future in enumerate(asyncio.as_completed(futures)):
-                    result = await future
-                    batch_results.append(result)
-                    logger.info(f"✅ Lote {i+1}/{len(futures)} concluído: {result['frames_processed']} frames processados")
+                logger.info("⏳ Aguardando conclusão dos workers...")
+                try:
+                    batch_results = await asyncio.gather(*futures)
+                finally:
+                    # Libera o leitor caso os workers tenham parado antes do fim do vídeo
+                    stop_event.set()
             
             # Consolidar resultados
-            alert_counts = {}
+            total_counts = Counter()
             total_processed_frames = 0
             
             for batch_result in batch_results:
                 total_processed_frames += batch_result["frames_processed"]
-                for alert_type, count in batch_result["alert_counts"].items():
-                    alert_counts[alert_type] = alert_counts.get(alert_type, 0) + count
+                total_counts.update(batch_result["alert_counts"])
+            
+            alert_counts = dict(total_counts)
             
             processing_time = time.time() - start_time
             logger.info(f"Processamento YOLO paralelo concluído: {total_processed_frames} frames em {processing_time:.2f}s")
@@ -331,7 +571,8 @@ class DetectionHandler:
             alert_counts["_metadata"] = {
                 "total_processed_frames": total_processed_frames,
                 "processing_time": processing_time,
-                "fps": fps
+                "fps": fps,
+                "early_exit": tracker is not None and tracker.decided
             }
             
             return alert_counts
@@ -340,108 +581,216 @@ class DetectionHandler:
             logger.error(f"Erro ao processar vídeo paralelo {event.file_path}: {e}")
             return {}
     
-    def process_frame_batch(self, video_path: str, frame_indices: List[int], fps: float, enabled_alerts: List[str], camera_type: str, batch_id: int = 0) -> Dict:
-        """Processa um lote de frames de forma síncrona (executado em thread separada)"""
+    def _read_frames(self, cap: cv2.VideoCapture, target_indices: List[int], frame_queue: queue.Queue, stop_event: threading.Event, num_consumers: int):
+        """Decodifica os frames alvo em sequência e os entrega na fila (executado em thread dedicada).
+        
+        Assume a posse do capture aberto por process_video_parallel e o libera ao terminar.
+        """
         try:
-            logger.info(f"🔄 [Lote {batch_id}] [{camera_type}] Iniciando processamento de {len(frame_indices)} frames")
+            # Log de progresso a cada 10% dos frames
+            progress_interval = max(1, len(target_indices) // 10)
+            
+            for i, (frame_idx, frame) in enumerate(self._iter_selected_frames(cap, target_indices)):
+                if frame is None:
+                    logger.debug(f"⚠️ Frame {frame_idx} não pôde ser lido")
+                    continue
+                
+                # Log de progresso
+                if i % progress_interval == 0 or i == len(target_indices) - 1:
+                    progress = (i + 1) / len(target_indices) * 100
+                    logger.info(f"📊 Leitura: {progress:.1f}% ({i+1}/{len(target_indices)} frames)")
+                
+                # Reduzir antes de enfileirar: menos memória na fila e menos pré-processamento no YOLO
+                frame = self._resize_for_inference(frame)
+                
+                if not self._put_frame(frame_queue, (frame_idx, frame), stop_event):
+                    break
+                    
+        except Exception as e:
+            logger.error(f"❌ Erro ao ler frames: {e}")
+        finally:
+            cap.release()
+            # Sinalizar fim do vídeo para cada worker
+            for _ in range(num_consumers):
+                if not self._put_frame(frame_queue, None, stop_event):
+                    break
+    
+    def _resize_for_inference(self, frame: np.ndarray) -> np.ndarray:
+        """Reduz o frame (mantendo a proporção) para que o lado maior tenha imgsz pixels"""
+        height, width = frame.shape[:2]
+        scale = self.imgsz / max(height, width)
+        if scale >= 1:
+            return frame
+        return cv2.resize(frame, (round(width * scale), round(height * scale)), interpolation=cv2.INTER_LINEAR)
+    
+    @staticmethod
+    def _put_frame(frame_queue: queue.Queue, item, stop_event: threading.Event) -> bool:
+        """Enfileira um item respeitando o limite da fila; retorna False se o processamento foi interrompido"""
+        while not stop_event.is_set():
+            try:
+                frame_queue.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def process_frame_batch(self, frame_queue: queue.Queue, stop_event: threading.Event, tracker: AlertThresholdTracker, enabled_alerts: List[str], camera_type: str, batch_id: int = 0) -> Dict:
+        """Consome frames da fila e executa o YOLO em lotes (executado em thread separada)"""
+        thread_model = None
+        try:
+            logger.info(f"🔄 [Worker {batch_id}] [{camera_type}] Iniciando consumo de frames")
             
             # Obter modelo YOLO do pool pré-carregado para o tipo de câmera
             thread_model = self.get_thread_model(camera_type, batch_id)
             
-            cap = cv2.VideoCapture(video_path)
-            if not cap.isOpened():
-                logger.error(f"❌ [Lote {batch_id}] Erro ao abrir vídeo: {video_path}")
-                return {"frames_processed": 0, "alert_counts": {}}
-            
-            alert_counts = {}
+            alert_counts = Counter()
             frames_processed = 0
-            monitored_classes = set(enabled_alerts)
+            alert_rules = self._alert_rules(enabled_alerts)
             
-            logger.info(f"🎯 [Lote {batch_id}] Alertas monitorados: {monitored_classes}")
+            logger.info(f"🎯 [Worker {batch_id}] Alertas monitorados: {set(enabled_alerts)}")
             
-            # Log de progresso a cada 10% dos frames
-            progress_interval = max(1, len(frame_indices) // 10)
+            # Frames decodificados aguardando a próxima inferência em lote
+            pending = []
             
-            for i, frame_idx in enumerate(frame_indices):
-                if i%self.skip_frames != 0:
-                    continue
-                # Ir para o frame específico
-                cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
-                ret, frame = cap.read()
-                
-                if not ret or frame is None:
-                    logger.debug(f"⚠️ [Lote {batch_id}] Frame {frame_idx} não pôde ser lido")
+            while not stop_event.is_set():
+                try:
+                    item = frame_queue.get(timeout=0.5)
+                except queue.Empty:
                     continue
+                if item is None:
+                    break
                 
-                # Log de progresso
-                if i % progress_interval == 0 or i == len(frame_indices) - 1:
-                    progress = (i + 1) / len(frame_indices) * 100
-                    logger.info(f"📊 [Lote {batch_id}] Progresso: {progress:.1f}% ({i+1}/{len(frame_indices)} frames)")
-                
-                timestamp = frame_idx / fps
-                
-                # Executar YOLO no frame usando modelo da thread
-                detections = self.detect_objects_in_frame(frame, timestamp, thread_model)
-                
-                logger.debug(f"🔍 [Lote {batch_id}] Frame {frame_idx}: {len(detections)} detecções")
-                
-                # Processar detecções seguindo a lógica do camera_processor
-                detected_classes = set()
-                for detection in detections:
-                    class_name = detection.get("class_name", "")
-                    # Adicionar todas as classes detectadas pelo YOLO (não filtrar por monitored_classes)
-                    detected_classes.add(class_name)
-                
-                # Aplicar regras de negócio similar ao _yolo_inference_loop
-                # Modelo retorna classes em MAIÚSCULAS: PESSOA, COM_CAPACETE, COM_LUVA, etc.
-                # Banco tem códigos em inglês: NO_HELMET, SMOKING, etc.
-                
-                if "PESSOA" in detected_classes:
-                    logger.debug(f"👤 [Lote {batch_id}] Frame {frame_idx}: PESSOA detectada, classes: {detected_classes}")
-                    
-                    # Se detectou pessoa mas não detectou capacete → NO_HELMET (apenas se habilitado)
-                    if "COM_CAPACETE" not in detected_classes and "NO_HELMET" in monitored_classes:
-                        alert_counts["NO_HELMET"] = alert_counts.get("NO_HELMET", 0) + 1
-                        logger.debug(f"🪖 [Lote {batch_id}] Frame {frame_idx}: NO_HELMET detectado (sem capacete)")
-                    elif "COM_CAPACETE" in detected_classes:
-                        logger.debug(f"✅ [Lote {batch_id}] Frame {frame_idx}: COM_CAPACETE detectado")
-                    
-                    # Se detectou pessoa mas não detectou luva → NO_GLOVES (apenas se habilitado)
-                    if "COM_LUVA" not in detected_classes and "NO_GLOVES" in monitored_classes:
-                        alert_counts["NO_GLOVES"] = alert_counts.get("NO_GLOVES", 0) + 1
-                        logger.debug(f"🧤 [Lote {batch_id}] Frame {frame_idx}: NO_GLOVES detectado (sem luva)")
-                    elif "COM_LUVA" in detected_classes:
-                        logger.debug(f"✅ [Lote {batch_id}] Frame {frame_idx}: COM_LUVA detectado")
-                
-                # Adversidades diretas - mapear classes do modelo para códigos do banco
-                class_to_alert_mapping = {
-                    "FUMANDO_CIGARRO": "SMOKING",
-                    "SEM_CINTO": "NO_SEAT_BELT", 
-                    "USANDO_CELULAR": "USING_CELL_PHONE"
-                }
-                
-                for model_class, alert_code in class_to_alert_mapping.items():
-                    if model_class in detected_classes and alert_code in monitored_classes:
-                        alert_counts[alert_code] = alert_counts.get(alert_code, 0) + 1
-                
-                frames_processed += self.skip_frames
+                pending.append(item)
+                if len(pending) >= self.batch_size:
+                    frames_processed += self._infer_pending(pending, thread_model, alert_rules, alert_counts, tracker, stop_event, batch_id)
+                    pending = []
             
-            cap.release()
-            
-            # Retornar modelo ao pool
-            self.return_thread_model(thread_model, camera_type, batch_id)
+            # Inferir o restante (descartado se o resultado já foi decidido)
+            if pending and not stop_event.is_set():
+                frames_processed += self._infer_pending(pending, thread_model, alert_rules, alert_counts, tracker, stop_event, batch_id)
             
-            logger.info(f"✅ [Lote {batch_id}] [{camera_type}] Concluído: {frames_processed} frames, alertas: {alert_counts}")
-            return {"frames_processed": frames_processed, "alert_counts": alert_counts}
+            logger.info(f"✅ [Worker {batch_id}] [{camera_type}] Concluído: {frames_processed} frames, alertas: {alert_counts}")
+            return {"frames_processed": frames_processed, "alert_counts": dict(alert_counts)}
             
         except Exception as e:
-            logger.error(f"❌ [Lote {batch_id}] [{camera_type}] Erro ao processar lote de frames: {e}")
-            # Tentar retornar modelo mesmo em caso de erro
-            try:
-                self.return_thread_model(thread_model, camera_type, batch_id)
-            except:
-                pass
+            logger.error(f"❌ [Worker {batch_id}] [{camera_type}] Erro ao processar lote de frames: {e}")
             return {"frames_processed": 0, "alert_counts": {}}
+        finally:
+            # Retornar modelo ao pool
+            if thread_model is not None:
+                self.return_thread_model(thread_model, camera_type, batch_id)
+    
+    def _infer_pending(self, pending: List, model: YOLO, alert_rules: Tuple[Tuple[int, int, str], ...], alert_counts: Counter, tracker: AlertThresholdTracker, stop_event: threading.Event, batch_id: int = 0) -> int:
+        """Infere os frames pendentes, atualiza as contagens e retorna os frames processados (com skip_frames)"""
+        batch_counts = Counter()
+        self._count_alerts_in_frames(pending, model, alert_rules, batch_counts, batch_id)
+        alert_counts.update(batch_counts)
+        
+        if tracker.record(batch_counts, len(pending)) and not stop_event.is_set():
+            logger.info(f"⏹️ [Worker {batch_id}] Todos os alertas monitorados já decididos, encerrando inferência antecipadamente")
+            stop_event.set()
+        
+        return len(pending) * self.skip_frames
+    
+    @staticmethod
+    def _alert_rules(enabled_alerts: List[str]) -> Tuple[Tuple[int, int, str], ...]:
+        """Seleciona uma única vez as regras (de EPI e de classes diretas) cujos alertas estão habilitados.
+        
+        Cada regra é (bits exigidos, bits proibidos, alerta) sobre CLASS_BITS e dispara quando
+        (máscara & exigidos) == exigidos e (máscara & proibidos) == 0: pessoa sem o EPI
+        (exigido=pessoa, proibido=EPI) ou classe direta (exigido=classe, proibido=0).
+        """
+        monitored_classes = frozenset(enabled_alerts)
+        ppe_rules = tuple(
+            (CLASS_BITS[person_class], CLASS_BITS[ppe_class], alert_code)
+            for person_class, ppe_class, alert_code in PPE_CHECK
+            if alert_code in monitored_classes
+        )
+        direct_rules = tuple(
+            (CLASS_BITS[model_class], 0, alert_code)
+            for model_class, alert_code in CLASS_TO_ALERT.items()
+            if alert_code in monitored_classes
+        )
+        return ppe_rules + direct_rules
+    
+    def _count_alerts_in_frames(self, frames: List, model: YOLO, alert_rules: Tuple[Tuple[int, int, str], ...], alert_counts: Counter, batch_id: int = 0):
+        """Executa o YOLO em lote sobre (frame_idx, frame) e acumula as contagens de alertas"""
+        with torch.inference_mode():
+            results = model([frame for _, frame in frames], conf=app_config.YOLO_CONFIDENCE, imgsz=self.imgsz, half=self.use_half, verbose=False)
+        
+        # Frames sem nenhuma classe exigida pelas regras ativas são descartados com um único teste
+        trigger_mask = 0
+        for required_bits, _, _ in alert_rules:
+            trigger_mask |= required_bits
+        
+        for (frame_idx, _), result in zip(frames, results):
+            # Apenas as classes detectadas são usadas nas regras de alerta
+            detected_mask = self._class_mask_from_result(result, model)
+            if not detected_mask & trigger_mask:
+                continue
+            
+            logger.debug(f"🔍 [Lote {batch_id}] Frame {frame_idx}: máscara de classes {detected_mask:#08b}")
+            
+            # Ex.: PESSOA sem COM_CAPACETE → NO_HELMET; FUMANDO_CIGARRO → SMOKING
+            for required_bits, forbidden_bits, alert_code in alert_rules:
+                if (detected_mask & required_bits) == required_bits and not detected_mask & forbidden_bits:
+                    alert_counts[alert_code] += 1
+                    logger.debug(f"🚨 [Lote {batch_id}] Frame {frame_idx}: {alert_code} detectado")
+    
+    def _class_mask_from_result(self, result, model: YOLO) -> int:
+        """Converte as classes de um resultado YOLO em uma máscara de bits de CLASS_BITS"""
+        boxes = result.boxes
+        if boxes is None or len(boxes) == 0:
+            return 0
+        
+        # IDs inteiros direto na tabela id → bit, sem passar pelos nomes das classes
+        class_ids = boxes.cls.int().cpu().numpy()
+        return int(np.bitwise_or.reduce(self._class_bits_for(model)[class_ids]))
+    
+    def _class_bits_for(self, model: YOLO) -> np.ndarray:
+        """Tabela (indexada pelo ID de classe do modelo) com o bit de CLASS_BITS de cada classe, montada uma vez por modelo"""
+        table = self._class_bit_tables.get(id(model))
+        if table is None:
+            names = model.names
+            table = np.zeros(max(names) + 1, dtype=np.int64)
+            for class_id, class_name in names.items():
+                table[class_id] = CLASS_BITS.get(class_name, 0)
+            self._class_bit_tables[id(model)] = table
+        return table
+    
+    def _iter_selected_frames(self, cap: cv2.VideoCapture, target_indices: List[int]):
+        """Percorre o vídeo sequencialmente decodificando apenas os frames alvo.
+        
+        grab() avança o stream sem a conversão YUV→BGR; retrieve() só é chamado
+        nos índices de interesse. Seek (CAP_PROP_POS_FRAMES) apenas no início e
+        em lacunas maiores que MAX_GRAB_GAP_FRAMES, onde avançar frame a frame
+        sairia mais caro que reposicionar no keyframe.
+        
+        Gera tuplas (frame_idx, frame), com frame=None quando a leitura falha.
+        """
+        position = None  # Índice do próximo frame retornado por grab()
+        
+        for frame_idx in target_indices:
+            if position is None or frame_idx < position or frame_idx - position > MAX_GRAB_GAP_FRAMES:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
+                position = frame_idx
+            
+            # Descartar frames intermediários sem decodificar para BGR
+            ok = True
+            while position < frame_idx and ok:
+                ok = cap.grab()
+                position += 1
+            
+            if ok:
+                ok = cap.grab()
+                position += 1
+            
+            if not ok:
+                yield frame_idx, None
+                continue
+            
+            ok, frame = cap.retrieve()
+            yield frame_idx, frame if ok else None
     
     async def generate_alerts_from_counts(self, event: TriggerDetectionEvent, alert_counts: Dict[str, int]):
         """Gera alertas baseado nas contagens e cooldown"""
@@ -453,6 +802,14 @@ class DetectionHandler:
                 logger.warning("Nenhum frame processado, não gerando alertas")
                 return
             
+            # Vídeo sem nenhuma classe monitorada (caso mais comum): nada a avaliar
+            if not any(count for alert_type, count in alert_counts.items() if not alert_type.startswith("_")):
+                logger.debug("Nenhuma adversidade detectada, não gerando alertas")
+                return
+            
+            # Alertas que atingiram o threshold: alert_type -> (count, percentage)
+            triggered = {}
+            
             for alert_type, count in alert_counts.items():
                 if alert_type.startswith("_"):  # Skip metadata
                     continue
@@ -463,139 +820,134 @@ class DetectionHandler:
                 logger.warning(f"Alerta {alert_type}: {count} em {total_frames} frames ({percentage*100:.1f}%)")
                 if percentage >= self.detection_threshold:
                     logger.info(f"Alerta {alert_type}: {count * self.skip_frames}/{total_frames} frames ({percentage*100:.1f}%)")
-                    
-                    # Verificar cooldown
-                    if await self.should_trigger_alert(event.camera.id, alert_type):
-                        await self.create_and_publish_alert(event, alert_type, count, total_frames, percentage)
-                    else:
-                        logger.info(f"Alerta {alert_type} em cooldown para câmera {event.camera.name}")
+                    triggered[alert_type] = (count, percentage)
                 else:
                     logger.debug(f"Alerta {alert_type} abaixo do threshold: {percentage*100:.1f}% < {self.detection_threshold*100}%")
+            
+            if not triggered:
+                return
+            
+            # Tipos de alerta vêm do cache; o cooldown de todos os alertas disparados em uma única consulta
+            all_alert_types = await self._get_alert_types()
+            alert_types = {code: all_alert_types[code] for code in triggered if code in all_alert_types}
+            
+            in_cooldown = set()
+            if alert_types:
+                loop = asyncio.get_event_loop()
+                in_cooldown = await loop.run_in_executor(
+                    None, self._load_cooldown_codes, event.camera.id, alert_types
+                )
+            
+            for alert_type, (count, percentage) in triggered.items():
+                # Verificar cooldown
+                if alert_type in in_cooldown:
+                    logger.info(f"Alerta {alert_type} em cooldown para câmera {event.camera.name}")
+                    continue
+                
+                alert_type_obj = alert_types.get(alert_type)
+                if alert_type_obj is None:
+                    logger.warning(f"Tipo de alerta {alert_type} não encontrado no banco")
+                    continue
+                
+                await self.create_and_publish_alert(event, alert_type, count, total_frames, percentage, alert_type_obj)
         
         except Exception as e:
             logger.error(f"Erro ao gerar alertas: {e}")
     
-    async def should_trigger_alert(self, camera_id: int, alert_type: str) -> bool:
-        """Verifica cooldown de alertas"""
-        try:
-            with get_db_session() as db:
-                # Buscar último alerta deste tipo para esta câmera
-                cutoff_time = datetime.utcnow() - timedelta(hours=self.alert_cooldown_hours)
-                
-                recent_alert = db.query(CameraAlert).filter(
-                    CameraAlert.camera_id == camera_id,
-                    CameraAlert.triggered_at > cutoff_time
-                ).join(CameraAlert.alert_type).filter(
-                    CameraAlert.alert_type.has(code=alert_type)
-                ).first()
-                
-                should_trigger = recent_alert is None
-                if not should_trigger:
-                    logger.debug(f"Alerta {alert_type} em cooldown até {recent_alert.triggered_at + timedelta(hours=self.alert_cooldown_hours)}")
-                
-                return should_trigger
+    async def _get_alert_types(self) -> Dict[str, AlertTypeSnapshot]:
+        """Retorna o mapa código → AlertTypeSnapshot, recarregando-o do banco quando o TTL expira"""
+        if time.monotonic() - self._alert_type_cache_ts < ALERT_TYPE_CACHE_TTL:
+            return self._alert_type_cache
+        
+        async with self._alert_type_cache_lock:
+            # Outro evento pode ter recarregado o cache enquanto aguardávamos o lock
+            if time.monotonic() - self._alert_type_cache_ts < ALERT_TYPE_CACHE_TTL:
+                return self._alert_type_cache
             
-        except Exception as e:
-            logger.error(f"Erro ao verificar cooldown: {e}")
-            return False
+            try:
+                loop = asyncio.get_event_loop()
+                self._alert_type_cache = await loop.run_in_executor(None, self._fetch_alert_types)
+                self._alert_type_cache_ts = time.monotonic()
+                logger.debug(f"Cache de tipos de alerta recarregado: {len(self._alert_type_cache)} tipos")
+            except Exception as e:
+                # Mantém o cache anterior (se houver) até a próxima tentativa
+                logger.error(f"Erro ao recarregar cache de tipos de alerta: {e}")
+        
+        return self._alert_type_cache
+    
+    async def _get_alert_type(self, alert_type: str) -> Optional[AlertTypeSnapshot]:
+        """Busca um tipo de alerta pelo código no cache"""
+        return (await self._get_alert_types()).get(alert_type)
     
-    async def create_and_publish_alert(self, event: TriggerDetectionEvent, alert_type: str, count: int, total_frames: int, percentage: float):
-        """Cria e publica alerta no event bus"""
+    @staticmethod
+    def _fetch_alert_types() -> Dict[str, AlertTypeSnapshot]:
+        """Carrega todos os tipos de alerta em uma única consulta (executado em thread separada)"""
+        with get_db_session() as db:
+            rows = db.query(AlertType.code, AlertType.id, AlertType.name, AlertType.severity).all()
+        
+        return {
+            code: AlertTypeSnapshot(id=alert_type_id, name=name, severity=severity)
+            for code, alert_type_id, name, severity in rows
+        }
+    
+    def _load_cooldown_codes(self, camera_id: int, alert_types: Dict[str, AlertTypeSnapshot]) -> Set[str]:
+        """Retorna os códigos de alerta em cooldown para a câmera (executado em thread separada)"""
+        cutoff_time = datetime.utcnow() - timedelta(hours=self.alert_cooldown_hours)
+        code_by_id = {alert_type.id: code for code, alert_type in alert_types.items()}
+        
+        with get_db_session() as db:
+            # Último alerta de cada tipo dentro da janela de cooldown
+            recent_alerts = db.query(
+                CameraAlert.alert_type_id,
+                func.max(CameraAlert.triggered_at)
+            ).filter(
+                CameraAlert.camera_id == camera_id,
+                CameraAlert.triggered_at > cutoff_time,
+                CameraAlert.alert_type_id.in_(code_by_id)
+            ).group_by(CameraAlert.alert_type_id).all()
+        
+        in_cooldown = set()
+        for alert_type_id, last_triggered_at in recent_alerts:
+            alert_code = code_by_id[alert_type_id]
+            in_cooldown.add(alert_code)
+            logger.debug(f"Alerta {alert_code} em cooldown até {last_triggered_at + timedelta(hours=self.alert_cooldown_hours)}")
+        
+        return in_cooldown
+    
+    async def create_and_publish_alert(self, event: TriggerDetectionEvent, alert_type: str, count: int, total_frames: int, percentage: float, alert_type_obj: AlertTypeSnapshot = None):
+        """Cria e publica alerta no event bus (alert_type_obj já carregado dispensa a busca no cache)"""
         try:
             # Buscar informações do tipo de alerta
-            from models import AlertType
-            
-            with get_db_session() as db:
-                alert_type_obj = db.query(AlertType).filter(AlertType.code == alert_type).first()
+            if alert_type_obj is None:
+                alert_type_obj = await self._get_alert_type(alert_type)
                 if not alert_type_obj:
                     logger.warning(f"Tipo de alerta {alert_type} não encontrado no banco")
                     return
-                
-                # Criar evento de alerta
-                alert_event = create_alert_event(
-                    camera_id=event.camera.id,
-                    camera_name=event.camera.name,
-                    camera_ip=event.camera.ip_address,
-                    alert_type_code=alert_type,
-                    alert_type_name=alert_type_obj.name,
-                    alert_type_id=alert_type_obj.id,
-                    severity=alert_type_obj.severity,
-                    confidence=percentage,  # Usar percentual como confiança
-                    metadata={
-                        "video_file": event.file_path,
-                        "detection_count": count,
-                        "total_frames": total_frames,
-                        "detection_percentage": percentage,
-                        "processing_timestamp": event.timestamp.isoformat(),
-                        "cooldown_hours": self.alert_cooldown_hours
-                    }
-                )
-                
-                # Publicar no event bus
-                await event_bus.publish(alert_event)
-                
-                logger.info(f"Alerta {alert_type} publicado para câmera {event.camera.name} - {count}/{total_frames} frames ({percentage*100:.1f}%)")
             
-        except Exception as e:
-            logger.error(f"Erro ao criar e publicar alerta: {e}")
-        
-    def detect_objects_in_frame(self, frame, timestamp: float, model: YOLO = None) -> List[Dict]:
-        """Detecta objetos em um frame usando YOLO"""
-        try:
-            # Usar modelo fornecido ou modelo principal
-            yolo_model = model if model is not None else self.model
-            
-            # Fazer detecção
-            results = yolo_model(frame, conf=app_config.YOLO_CONFIDENCE, verbose=False)
-            
-            detections = []
-            
-            for result in results:
-                boxes = result.boxes
-                if boxes is not None:
-                    for box in boxes:
-                        # Obter informações da detecção
-                        class_id = int(box.cls.cpu().numpy())
-                        confidence = float(box.conf.cpu().numpy())
-                        class_name = yolo_model.names[class_id]
-                        
-                        # Coordenadas da bounding box
-                        x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                        
-                        # Normalizar coordenadas (0-1)
-                        height, width = frame.shape[:2]
-                        normalized_box = {
-                            "x1": float(x1 / width),
-                            "y1": float(y1 / height),
-                            "x2": float(x2 / width),
-                            "y2": float(y2 / height)
-                        }
-                        
-                        detection = {
-                            "timestamp": timestamp,
-                            "class_id": class_id,
-                            "class_name": class_name,
-                            "confidence": confidence,
-                            "bounding_box": {
-                                "pixel_coords": {
-                                    "x1": int(x1),
-                                    "y1": int(y1),
-                                    "x2": int(x2),
-                                    "y2": int(y2)
-                                },
-                                "normalized_coords": normalized_box
-                            },
-                            "center_point": {
-                                "x": float((x1 + x2) / 2 / width),
-                                "y": float((y1 + y2) / 2 / height)
-                            },
-                            "area": float((x2 - x1) * (y2 - y1) / (width * height))
-                        }
-                        
-                        detections.append(detection)
-            
-            return detections
+            # Criar evento de alerta
+            alert_event = create_alert_event(
+                camera_id=event.camera.id,
+                camera_name=event.camera.name,
+                camera_ip=event.camera.ip_address,
+                alert_type_code=alert_type,
+                alert_type_name=alert_type_obj.name,
+                alert_type_id=alert_type_obj.id,
+                severity=alert_type_obj.severity,
+                confidence=percentage,  # Usar percentual como confiança
+                metadata={
+                    "video_file": event.file_path,
+                    "detection_count": count,
+                    "total_frames": total_frames,
+                    "detection_percentage": percentage,
+                    "processing_timestamp": event.timestamp.isoformat(),
+                    "cooldown_hours": self.alert_cooldown_hours
+                }
+            )
+            
+            # Publicar no event bus
+            await event_bus.publish(alert_event)
+            
+            logger.info(f"Alerta {alert_type} publicado para câmera {event.camera.name} - {count}/{total_frames} frames ({percentage*100:.1f}%)")
             
         except Exception as e:
-            logger.error(f"Erro ao detectar objetos no frame: {e}")
-            return []
\ No newline at end of file
+            logger.error(f"Erro ao criar e publicar alerta: {e}")
@@ -3,16 +3,66 @@ Handler Frigate - Integra com API do Frigate quando alertas são detectados
 """
 import asyncio
 import aiohttp
+import copy
 import json
 import logging
+import random
+import time
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Set, Tuple
 from urllib.parse import urljoin
 
 from ..event_system import AlertEvent, EventType
 
+try:
+    import orjson  # Opcional: (de)serialização JSON mais rápida nas chamadas à API
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+# Backoff entre tentativas (segundos): base do crescimento exponencial e teto
+RETRY_BACKOFF_BASE = 0.5
+RETRY_BACKOFF_MAX = 30
+
+# Tempo (s) em que a configuração lida de /api/config/cameras/<câmera> é reutilizada
+CAMERA_CONFIG_CACHE_TTL = 60
+
+# Pool de conexões keep-alive compartilhado por todas as instâncias do handler.
+# Criado sob demanda (exige event loop em execução) e fechado por close_shared_connector().
+_shared_connector: Optional[aiohttp.TCPConnector] = None
+
+
+def _get_shared_connector() -> aiohttp.TCPConnector:
+    """Retorna o connector HTTP compartilhado, criando-o se necessário"""
+    global _shared_connector
+    if _shared_connector is None or _shared_connector.closed:
+        _shared_connector = aiohttp.TCPConnector(limit=32, limit_per_host=8, keepalive_timeout=75)
+    return _shared_connector
+
+
+def _json_dumps(obj: Any) -> str:
+    """Serializador usado pela sessão aiohttp (que espera str)"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=str).decode()
+    return json.dumps(obj, default=str)
+
+
+def _json_loads(data: str) -> Any:
+    """Desserializador das respostas da API do Frigate"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+async def close_shared_connector():
+    """Fecha o connector compartilhado (encerramento da aplicação)"""
+    global _shared_connector
+    if _shared_connector is not None:
+        await _shared_connector.close()
+        _shared_connector = None
+
+
 class FrigateHandler:
     """Handler para integração com API do Frigate"""
     
@@ -25,13 +75,21 @@ class FrigateHandler:
         self.max_retries = max_retries
         self.session: Optional[aiohttp.ClientSession] = None
         self.is_initialized = False
+        # Operações ainda em andamento após handle_event já ter retornado
+        self._background_tasks: Set[asyncio.Task] = set()
+        # Configuração de câmera por nome: (horário da leitura no Frigate, configuração)
+        self._config_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._config_locks: Dict[str, asyncio.Lock] = {}
         
     async def initialize(self):
         """Inicializa o handler do Frigate"""
         try:
-            # Criar sessão HTTP
+            # Criar sessão HTTP sobre o connector compartilhado (a sessão não o fecha)
             timeout = aiohttp.ClientTimeout(total=self.api_timeout)
             self.session = aiohttp.ClientSession(
+                connector=_get_shared_connector(),
+                connector_owner=False,
+                json_serialize=_json_dumps,
                 timeout=timeout,
                 headers={
                     "Content-Type": "application/json",
@@ -53,6 +111,8 @@ class FrigateHandler:
     
     async def cleanup(self):
         """Limpa recursos do handler"""
+        if self._background_tasks:
+            await asyncio.gather(*self._background_tasks, return_exceptions=True)
         if self.session:
             await self.session.close()
         logger.info("Frigate Handler finalizado")
@@ -67,19 +127,27 @@ class FrigateHandler:
         
         # Tentar múltiplas operações com Frigate
         tasks = [
-            self._register_event(event),
-            self._update_camera_config(event),
-            self._save_detection_data(event)
+            asyncio.create_task(self._register_event(event)),
+            asyncio.create_task(self._update_camera_config(event)),
+            asyncio.create_task(self._save_detection_data(event))
         ]
         
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        # Verificar se pelo menos uma operação foi bem-sucedida
-        for result in results:
+        # Basta uma operação bem-sucedida: retornar assim que a primeira concluir com sucesso
+        for next_done in asyncio.as_completed(tasks):
+            try:
+                result = await next_done
+            except Exception:
+                continue
             if isinstance(result, bool) and result:
                 success = True
                 break
         
+        # As demais operações não são canceladas (ainda gravam no Frigate); seguem em segundo plano
+        for task in tasks:
+            if not task.done():
+                self._background_tasks.add(task)
+                task.add_done_callback(self._background_tasks.discard)
+        
         if not success:
             logger.warning(f"Nenhuma operação Frigate foi bem-sucedida para evento {event.event_id}")
         
@@ -92,7 +160,7 @@ class FrigateHandler:
             
             async with self.session.get(url) as response:
                 if response.status == 200:
-                    data = await response.json()
+                    data = await response.json(loads=_json_loads)
                     logger.info(f"Frigate conectado - Versão: {data.get('version', 'unknown')}")
                 else:
                     raise Exception(f"Frigate API retornou status {response.status}")
@@ -142,7 +210,8 @@ class FrigateHandler:
                     logger.warning(f"Erro ao registrar evento no Frigate (attempt {attempt + 1}): {e}")
                 
                 if attempt < self.max_retries - 1:
-                    await asyncio.sleep(2 ** attempt)  # Backoff exponencial
+                    # Backoff exponencial com jitter completo: evita retentativas sincronizadas
+                    await asyncio.sleep(random.uniform(0, min(RETRY_BACKOFF_MAX, RETRY_BACKOFF_BASE * 2 ** attempt)))
             
             return False
             
@@ -156,47 +225,69 @@ class FrigateHandler:
             camera_name = f"camera_{event.camera_id}"
             url = urljoin(self.frigate_base_url, f"/api/config/cameras/{camera_name}")
             
-            # Buscar configuração atual
-            async with self.session.get(url) as response:
-                if response.status != 200:
-                    logger.warning(f"Câmera {camera_name} não encontrada no Frigate")
+            # Atualizações da mesma câmera em sequência: cada uma parte da configuração já
+            # enviada pela anterior (sem perder incrementos de alert_stats)
+            async with self._config_locks.setdefault(camera_name, asyncio.Lock()):
+                # Buscar configuração atual (do cache enquanto não expirar)
+                current_config = await self._get_camera_config(camera_name, url)
+                if current_config is None:
                     return False
                 
-                current_config = await response.json()
-            
-            # Atualizar estatísticas na configuração
-            if "metadata" not in current_config:
-                current_config["metadata"] = {}
-            
-            current_config["metadata"].update({
-                "last_alert": {
-                    "timestamp": event.detected_at.isoformat(),
-                    "type": event.alert_type_code,
-                    "confidence": event.confidence,
-                    "event_id": event.event_id
-                },
-                "alert_stats": current_config["metadata"].get("alert_stats", {})
-            })
-            
-            # Incrementar contador do tipo de alerta
-            alert_stats = current_config["metadata"]["alert_stats"]
-            if event.alert_type_code not in alert_stats:
-                alert_stats[event.alert_type_code] = 0
-            alert_stats[event.alert_type_code] += 1
-            
-            # Enviar configuração atualizada
-            async with self.session.put(url, json=current_config) as response:
-                if response.status == 200:
-                    logger.debug(f"Configuração da câmera {camera_name} atualizada no Frigate")
-                    return True
-                else:
-                    logger.warning(f"Falha ao atualizar configuração no Frigate: {response.status}")
-                    return False
+                # Atualizar estatísticas na configuração
+                if "metadata" not in current_config:
+                    current_config["metadata"] = {}
+                
+                current_config["metadata"].update({
+                    "last_alert": {
+                        "timestamp": event.detected_at.isoformat(),
+                        "type": event.alert_type_code,
+                        "confidence": event.confidence,
+                        "event_id": event.event_id
+                    },
+                    "alert_stats": current_config["metadata"].get("alert_stats", {})
+                })
+                
+                # Incrementar contador do tipo de alerta
+                alert_stats = current_config["metadata"]["alert_stats"]
+                if event.alert_type_code not in alert_stats:
+                    alert_stats[event.alert_type_code] = 0
+                alert_stats[event.alert_type_code] += 1
+                
+                # Enviar configuração atualizada
+                async with self.session.put(url, json=current_config) as response:
+                    if response.status == 200:
+                        # Mantém o horário da leitura: o cache expira e é relido do Frigate periodicamente
+                        fetched_at = self._config_cache.get(camera_name, (time.monotonic(), None))[0]
+                        self._config_cache[camera_name] = (fetched_at, current_config)
+                        logger.debug(f"Configuração da câmera {camera_name} atualizada no Frigate")
+                        return True
+                    else:
+                        self._config_cache.pop(camera_name, None)
+                        logger.warning(f"Falha ao atualizar configuração no Frigate: {response.status}")
+                        return False
                     
         except Exception as e:
+            self._config_cache.pop(f"camera_{event.camera_id}", None)
             logger.error(f"Erro ao atualizar configuração da câmera no Frigate: {e}")
             return False
     
+    async def _get_camera_config(self, camera_name: str, url: str) -> Optional[Dict[str, Any]]:
+        """Retorna uma cópia da configuração da câmera, buscando-a no Frigate quando o cache expirou"""
+        cached = self._config_cache.get(camera_name)
+        if cached and time.monotonic() - cached[0] < CAMERA_CONFIG_CACHE_TTL:
+            return copy.deepcopy(cached[1])
+        
+        async with self.session.get(url) as response:
+            if response.status != 200:
+                self._config_cache.pop(camera_name, None)
+                logger.warning(f"Câmera {camera_name} não encontrada no Frigate")
+                return None
+            
+            current_config = await response.json(loads=_json_loads)
+        
+        self._config_cache[camera_name] = (time.monotonic(), copy.deepcopy(current_config))
+        return current_config
+    
     async def _save_detection_data(self, event: AlertEvent) -> bool:
         """Salva dados de detecção no Frigate"""
         try:
@@ -4,15 +4,33 @@ Handler MQTT - Envia mensagens via MQTT quando alertas são detectados
 import asyncio
 import json
 import logging
+import random
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 import paho.mqtt.client as mqtt
 from paho.mqtt.client import Client as MQTTClient
 
 from ..event_system import AlertEvent, EventType
 
+try:
+    import orjson  # Opcional: serialização mais rápida; sem ele usa o json da stdlib
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+# Espera máxima entre tentativas de conexão: RETRY_BACKOFF_BASE * 2^tentativa, limitada a RETRY_BACKOFF_MAX (s)
+RETRY_BACKOFF_BASE = 0.5
+RETRY_BACKOFF_MAX = 30
+
+
+def _dumps(message: Dict[str, Any]) -> bytes:
+    """Serializa a mensagem MQTT em JSON compacto (orjson quando disponível)"""
+    if orjson is not None:
+        return orjson.dumps(message, default=str, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(message, default=str, separators=(",", ":")).encode()
+
+
 class MQTTHandler:
     """Handler para envio de mensagens MQTT"""
     
@@ -27,6 +45,8 @@ class MQTTHandler:
         self.username = username
         self.password = password
         self.topic_prefix = topic_prefix
+        # Tópicos por (câmera, tipo, severidade), montados na primeira ocorrência de cada combinação
+        self._topics_cache: Dict[Tuple[Any, str, str], Tuple[Tuple[str, int], ...]] = {}
         self.client: Optional[MQTTClient] = None
         self.is_connected = False
         self._connection_retry_count = 0
@@ -70,20 +90,20 @@ class MQTTHandler:
                 return False
         
         try:
-            # Preparar dados para MQTT
-            mqtt_message = self._prepare_mqtt_message(event)
+            # Preparar dados para MQTT (serializados uma única vez para todos os tópicos)
+            payload = _dumps(self._prepare_mqtt_message(event))
             
             # Definir tópicos
             topics = self._get_topics(event)
             
             # Enviar para cada tópico
             success = True
-            for topic in topics:
+            for topic, qos in topics:
                 try:
                     result = self.client.publish(
                         topic=topic,
-                        payload=json.dumps(mqtt_message, default=str),
-                        qos=1,  # At least once delivery
+                        payload=payload,
+                        qos=qos,
                         retain=False
                     )
                     
@@ -131,22 +151,21 @@ class MQTTHandler:
             "version": "1.0"
         }
     
-    def _get_topics(self, event: AlertEvent) -> list[str]:
-        """Gera lista de tópicos MQTT para o evento"""
-        topics = []
-        
-        # Tópico geral de alertas
-        topics.append(f"{self.topic_prefix}/all")
-        
-        # Tópico por câmera
-        topics.append(f"{self.topic_prefix}/camera/{event.camera_id}")
-        
-        # Tópico por tipo de alerta
-        topics.append(f"{self.topic_prefix}/type/{event.alert_type_code}")
-        
-        # Tópico por severidade
-        topics.append(f"{self.topic_prefix}/severity/{event.severity}")
+    def _get_topics(self, event: AlertEvent) -> Tuple[Tuple[str, int], ...]:
+        """Gera lista de (tópico, QoS) MQTT para o evento.
         
+        Apenas o tópico por tipo de alerta (o acionável) usa QoS 1 (at least once);
+        os tópicos de fanout usam QoS 0 e não exigem confirmação do broker.
+        """
+        key = (event.camera_id, event.alert_type_code, event.severity)
+        topics = self._topics_cache.get(key)
+        if topics is None:
+            topics = self._topics_cache[key] = (
+                (f"{self.topic_prefix}/all", 0),                              # Tópico geral de alertas
+                (f"{self.topic_prefix}/camera/{event.camera_id}", 0),         # Tópico por câmera
+                (f"{self.topic_prefix}/type/{event.alert_type_code}", 1),     # Tópico por tipo de alerta
+                (f"{self.topic_prefix}/severity/{event.severity}", 0)         # Tópico por severidade
+            )
         return topics
     
     async def _connect_with_retry(self):
@@ -183,7 +202,8 @@ class MQTTHandler:
                 logger.warning(f"Tentativa {attempt + 1} de conexão MQTT falhou: {e}")
                 
                 if attempt < self._max_retries - 1:
-                    await asyncio.sleep(2 ** attempt)  # Backoff exponencial
+                    # Jitter completo: após uma queda do broker, as instâncias não reconectam todas ao mesmo tempo
+                    await asyncio.sleep(random.uniform(0, min(RETRY_BACKOFF_MAX, RETRY_BACKOFF_BASE * 2 ** attempt)))
         
         logger.error(f"Falha ao conectar MQTT após {self._max_retries} tentativas")
         return False
@@ -1,18 +1,59 @@
 
+import asyncio
 import logging
+import queue
+import threading
 import time
-import os
-from typing import Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 
 import mediapipe as mp
 import cv2
+import numpy as np
 from ..event_system import NewVideoFileEvent, create_trigger_detection_event, event_bus
+from ..file_processor import open_video_capture, wait_for_file_complete_async
 from config import app_config, get_db_session
 from models import Camera
 
 
 logger = logging.getLogger(__name__)
 
+# Lado maior (px) do frame entregue ao MediaPipe; o Pose redimensiona internamente para ~256 px
+MEDIAPIPE_MAX_SIDE = 480
+
+# Frames amostrados decodificados à frente da inferência (limita a memória do leitor)
+FRAME_QUEUE_SIZE = 8
+
+# Fração mínima dos frames amostrados com pessoa para disparar a detecção YOLO
+DETECTION_TRIGGER_RATIO = 0.1
+
+# Tempo (s) em que uma câmera ativa encontrada no banco é reutilizada sem nova consulta
+CAMERA_CACHE_TTL = 300
+
+
+def _put_frame(frame_queue: queue.Queue, item, stop_event: threading.Event) -> bool:
+    """Enfileira um item respeitando o limite da fila; retorna False se o consumo foi interrompido"""
+    while not stop_event.is_set():
+        try:
+            frame_queue.put(item, timeout=0.5)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _downscale_for_pose(frame: np.ndarray) -> np.ndarray:
+    """Reduz o frame para no máximo MEDIAPIPE_MAX_SIDE px no lado maior.
+    
+    Landmarks são normalizados em [0, 1], então não dependem da resolução.
+    """
+    height, width = frame.shape[:2]
+    scale = MEDIAPIPE_MAX_SIDE / max(height, width)
+    if scale < 1:
+        frame = cv2.resize(frame, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA)
+    return frame
+
+
 class NewVideoHandler:
     """Handler para processar novos arquivos de vídeo"""
         
@@ -21,11 +62,18 @@ class NewVideoHandler:
         # Configurar MediaPipe
         self.mp_pose = mp.solutions.pose
         self.mp_drawing = mp.solutions.drawing_utils
-        self.pose = self.mp_pose.Pose(
-            static_image_mode=False,
-            model_complexity=1,
-            min_detection_confidence=app_config.MEDIAPIPE_CONFIDENCE,
-            min_tracking_confidence=0.5
+        # Pose não é thread-safe: cada worker cria o seu (e o buffer RGB) na primeira utilização
+        self._local = threading.local()
+        self._poses: List = []
+        self._poses_lock = threading.Lock()
+        # Presença de pessoa não muda a 30 Hz: rodar MediaPipe a cada N frames
+        self._mp_every = max(1, app_config.MEDIAPIPE_SKIP_FRAMES)
+        self._mp_process_fps = app_config.MEDIAPIPE_PROCESS_FPS
+        # Câmeras ativas por nome: (horário da consulta, câmera desacoplada da sessão)
+        self._camera_cache: Dict[str, Tuple[float, Camera]] = {}
+        # Processamento dos vídeos fora do event loop
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, app_config.MEDIAPIPE_WORKERS), thread_name_prefix="mediapipe"
         )
         
     async def initialize(self):
@@ -33,82 +81,52 @@ class NewVideoHandler:
     
     async def cleanup(self):
         """Limpa recursos do handler"""
+        # Aguardar os vídeos em andamento antes de fechar os Pose que eles usam
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, self._executor.shutdown, True)
+        
+        # Liberar os grafos nativos do MediaPipe
+        with self._poses_lock:
+            poses, self._poses = self._poses, []
+        for pose in poses:
+            try:
+                pose.close()
+            except Exception as e:
+                logger.warning(f"Erro ao fechar MediaPipe Pose: {e}")
         logger.info("Video Handler finalizado")
 
-    def wait_for_file_complete(self, file_path: str, max_wait: int = 30) -> bool:
-        """Aguarda arquivo estar completamente escrito"""
-        start_time = time.time()
-        last_size = 0
-        
-        while time.time() - start_time < max_wait:
-            if not os.path.exists(file_path):
-                time.sleep(1)
-                continue
-                
-            current_size = os.path.getsize(file_path)
-            if current_size > 0 and current_size == last_size:
-                # Arquivo parou de crescer, assumir que está completo
-                time.sleep(2)  # Aguardar mais 2 segundos para garantir
-                return True
-                
-            last_size = current_size
-            time.sleep(1)
-        
-        return False
-    
     async def handle_event(self, event: NewVideoFileEvent) -> bool:
         """Processa evento de novo arquivo de vídeo"""
         try:
             logger.info(f"Novo arquivo de vídeo recebido: {event.file_path} às {event.timestamp}")
             # verificar se existe camera ativa cadastrada com esse nome
-            with get_db_session() as db:
-                camera_name = event.file_path.split("/")[-2] if "/" in event.file_path else "unknown_camera"
-                existent_camera = db.query(Camera).filter(Camera.name == camera_name, Camera.is_active == True).first()
-                if not existent_camera:
-                    logger.info(f"Câmera {camera_name} não encontrada no banco de dados. Evento ignorado.")
-                    return False
-                logger.info(f"Câmera {existent_camera.name} encontrada no banco de dados. Processando vídeo...")
-                event.camera = existent_camera
+            camera_name = event.file_path.split("/")[-2] if "/" in event.file_path else "unknown_camera"
+            existent_camera = await self._get_active_camera(camera_name)
+            if not existent_camera:
+                logger.info(f"Câmera {camera_name} não encontrada no banco de dados. Evento ignorado.")
+                return False
+            logger.info(f"Câmera {existent_camera.name} encontrada no banco de dados. Processando vídeo...")
+            event.camera = existent_camera
 
             # TODO: Verificar se já foi processado
             start_time = time.time()
             
-            if not self.wait_for_file_complete(event.file_path):
+            # Normalmente imediato: o fechamento do arquivo já foi sinalizado pelo inotify
+            if not await wait_for_file_complete_async(event.file_path):
                 logger.error(f"Arquivo não ficou completo: {event.file_path}")
                 return False
             
-            cap = cv2.VideoCapture(event.file_path)
-            
-            if not cap.isOpened():
-                raise Exception(f"Não foi possível abrir o vídeo: {event.file_path}")
-            
-            fps = cap.get(cv2.CAP_PROP_FPS)
-            detections = []
-            frame_count = 0
-            
-            while True:
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                
-                # Calcular timestamp do frame
-                timestamp = frame_count / fps
-                
-                # Detectar pessoa no frame
-                detection = self.detect_person_in_frame(frame, timestamp, frame_count=frame_count)
-                
-                if detection:
-                    detections.append(detection)
-                    logger.debug(f"Pessoa detectada no frame {frame_count} (t={timestamp:.2f}s)")
-                
-                frame_count += 1            
-            cap.release()
+            # Decodificação e MediaPipe são CPU-bound: rodar fora do event loop
+            loop = asyncio.get_event_loop()
+            detections, triggered = await loop.run_in_executor(
+                self._executor, self._process_video_sync, event.file_path
+            )
             
             processing_time = time.time() - start_time
             logger.info(f"Processamento concluído: {len(detections)} detecções em {processing_time:.2f}s")
             
-            #dispara evento se houver detecções em 10% dos frames
-            if len(detections) / frame_count >= 0.1:
+            #dispara evento se houver detecções em 10% dos frames amostrados
+            if triggered:
                 event.metadata['detections'] = detections
                 logger.info(f"🔍 Disparando evento de detecção para {event.file_path} com {len(detections)} detecções")
                 trigger_event = create_trigger_detection_event(event)
@@ -122,28 +140,174 @@ class NewVideoHandler:
             return False
         
         
+    def _process_video_sync(self, file_path: str) -> Tuple[List[Dict], bool]:
+        """Detecta pessoas nos frames amostrados do vídeo (executado no executor do handler).
+        
+        Retorna as detecções e se a fração de frames com pessoa atingiu DETECTION_TRIGGER_RATIO.
+        A leitura é interrompida assim que o limiar se torna inatingível; ao atingi-lo o vídeo
+        continua sendo lido, pois os timestamps das detecções guiam os frames analisados pelo YOLO.
+        """
+        cap = open_video_capture(file_path)
+        
+        if not cap.isOpened():
+            raise Exception(f"Não foi possível abrir o vídeo: {file_path}")
+        
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        stride = self._sampling_stride(fps)
+        # Alguns contêineres não informam o FPS: timestamps ficam em 0 em vez de dividir por zero
+        inv_fps = 1.0 / fps if fps > 0 else 0.0
+        # Total de frames amostrados previsto pelo contêiner (0 quando desconhecido: sem saída antecipada)
+        expected_samples = -(-max(0, int(cap.get(cv2.CAP_PROP_FRAME_COUNT))) // stride)
+        required_detections = DETECTION_TRIGGER_RATIO * expected_samples
+        detections = []
+        sampled_frames = 0
+        
+        # Decodificação em thread própria, sobreposta à inferência do MediaPipe
+        frame_queue = queue.Queue(maxsize=FRAME_QUEUE_SIZE)
+        stop_event = threading.Event()
+        reader = threading.Thread(
+            target=self._read_frames,
+            args=(cap, stride, frame_queue, stop_event),
+            name="mediapipe-reader",
+            daemon=True
+        )
+        reader.start()
+        
+        try:
+            while True:
+                item = frame_queue.get()
+                if item is None:
+                    break
+                frame_count, frame = item
+                
+                # Calcular timestamp do frame
+                timestamp = frame_count * inv_fps
+                
+                # Detectar pessoa no frame
+                detection = self.detect_person_in_frame(frame, timestamp, frame_count=frame_count)
+                sampled_frames += 1
+                
+                if detection:
+                    detections.append(detection)
+                    logger.debug(f"Pessoa detectada no frame {frame_count} (t={timestamp:.2f}s)")
+                
+                # Nem com pessoa em todos os frames restantes o limiar seria atingido
+                remaining = expected_samples - sampled_frames
+                if remaining > 0 and len(detections) + remaining < required_detections:
+                    logger.debug(f"Limiar de detecção inatingível após {sampled_frames} frames: {file_path}")
+                    return detections, False
+        finally:
+            # Libera o leitor caso o consumo tenha sido interrompido
+            stop_event.set()
+        
+        triggered = sampled_frames > 0 and len(detections) / sampled_frames >= DETECTION_TRIGGER_RATIO
+        return detections, triggered
+    
+    async def _get_active_camera(self, camera_name: str) -> Optional[Camera]:
+        """Busca a câmera ativa pelo nome, usando o cache enquanto não expirar"""
+        cached = self._camera_cache.get(camera_name)
+        if cached and time.monotonic() - cached[0] < CAMERA_CACHE_TTL:
+            return cached[1]
+        
+        loop = asyncio.get_event_loop()
+        camera = await loop.run_in_executor(None, self._fetch_active_camera, camera_name)
+        
+        # Câmeras não encontradas não são cacheadas: um cadastro novo vale já no próximo vídeo
+        if camera is None:
+            self._camera_cache.pop(camera_name, None)
+        else:
+            self._camera_cache[camera_name] = (time.monotonic(), camera)
+        return camera
+    
+    @staticmethod
+    def _fetch_active_camera(camera_name: str) -> Optional[Camera]:
+        """Consulta a câmera ativa no banco (executado em thread separada)"""
+        with get_db_session() as db:
+            return db.query(Camera).filter(Camera.name == camera_name, Camera.is_active == True).first()
+    
+    @staticmethod
+    def _read_frames(cap: cv2.VideoCapture, stride: int, frame_queue: queue.Queue, stop_event: threading.Event):
+        """Decodifica o vídeo e enfileira (frame_count, frame reduzido) dos frames amostrados (executado em thread dedicada)"""
+        try:
+            frame_count = 0
+            while not stop_event.is_set():
+                # grab() avança sem converter o frame; só os amostrados são decodificados
+                if not cap.grab():
+                    break
+                
+                # Amostragem temporal: detectar pessoa apenas a cada N frames
+                if frame_count % stride == 0:
+                    ret, frame = cap.retrieve()
+                    if not ret:
+                        break
+                    # Redução feita aqui, em paralelo com o Pose; a fila guarda frames pequenos
+                    if not _put_frame(frame_queue, (frame_count, _downscale_for_pose(frame)), stop_event):
+                        break
+                
+                frame_count += 1
+        except Exception as e:
+            logger.error(f"Erro ao ler frames do vídeo: {e}")
+        finally:
+            cap.release()
+            # Sinalizar fim do vídeo
+            _put_frame(frame_queue, None, stop_event)
+    
+    def _sampling_stride(self, fps: float) -> int:
+        """Intervalo (em frames) entre análises do MediaPipe.
+        
+        Com MEDIAPIPE_PROCESS_FPS definido, o intervalo acompanha o FPS do vídeo
+        (ex.: 30 fps a 2 fps de análise → 1 a cada 15 frames); caso contrário
+        usa o valor fixo de MEDIAPIPE_SKIP_FRAMES.
+        """
+        if self._mp_process_fps > 0 and fps > 0:
+            return max(1, int(fps // self._mp_process_fps))
+        return self._mp_every
+    
+    def _get_pose(self):
+        """Retorna o Pose da thread atual, criando-o no primeiro uso"""
+        pose = getattr(self._local, "pose", None)
+        if pose is None:
+            pose = self.mp_pose.Pose(
+                static_image_mode=False,
+                model_complexity=app_config.MEDIAPIPE_MODEL_COMPLEXITY,
+                min_detection_confidence=app_config.MEDIAPIPE_CONFIDENCE,
+                min_tracking_confidence=0.5
+            )
+            self._local.pose = pose
+            with self._poses_lock:
+                self._poses.append(pose)
+        return pose
+    
     def detect_person_in_frame(self, frame, timestamp: float, frame_count: int) -> Optional[Dict]:
         """Detecta pessoa em um frame usando MediaPipe"""
         try:
-            # Converter BGR para RGB (MediaPipe usa RGB)
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            # Reduzir antes da conversão: cvtColor e Pose operam sobre bem menos pixels
+            # (no-op para frames já reduzidos pelo leitor)
+            frame = _downscale_for_pose(frame)
+            
+            # Converter BGR para RGB (MediaPipe usa RGB) reaproveitando o buffer da thread
+            rgb_frame = getattr(self._local, "rgb_frame", None)
+            if rgb_frame is None or rgb_frame.shape != frame.shape:
+                rgb_frame = np.empty_like(frame)
+                self._local.rgb_frame = rgb_frame
+            cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=rgb_frame)
             
             # Processar frame
-            results = self.pose.process(rgb_frame)
+            results = self._get_pose().process(rgb_frame)
             
             if results.pose_landmarks:
-                # Calcular confiança média dos landmarks
-                confidence = sum([landmark.visibility for landmark in results.pose_landmarks.landmark]) / len(results.pose_landmarks.landmark)
-                
-                # Obter bounding box dos landmarks
+                # Landmarks (x, y, visibility) em um único array, lidos em uma só passada
                 landmarks = results.pose_landmarks.landmark
-                x_coords = [landmark.x for landmark in landmarks]
-                y_coords = [landmark.y for landmark in landmarks]
+                coords = np.fromiter(
+                    (value for landmark in landmarks for value in (landmark.x, landmark.y, landmark.visibility)),
+                    dtype=np.float32,
+                    count=len(landmarks) * 3
+                ).reshape(-1, 3)
                 
-                min_x = min(x_coords)
-                max_x = max(x_coords)
-                min_y = min(y_coords)
-                max_y = max(y_coords)
+                # Confiança média e bounding box dos landmarks (reduções vetorizadas)
+                min_x, min_y = coords[:, :2].min(axis=0).tolist()
+                max_x, max_y = coords[:, :2].max(axis=0).tolist()
+                confidence = float(coords[:, 2].mean())
                 
                 return {
                     "timestamp": timestamp,
@@ -4,8 +4,10 @@ import time
 from datetime import datetime, timedelta
 from typing import Dict
 
+from sqlalchemy import func, and_
+
 from models import SessionLocal, Camera, CameraStatus
-from services.network_service import is_connected
+from services.network_service import is_internet_connected
 from ..serial_manager import get_serial_manager
 
 logger = logging.getLogger(__name__)
@@ -120,30 +122,55 @@ class StatusHandler:
     async def _collect_system_status(self) -> Dict[str, bool]:
         """Coleta status atual do sistema"""
         try:
-            db = SessionLocal()
+            # Consultas ao banco e teste de conectividade são bloqueantes: executar fora do event loop
+            loop = asyncio.get_event_loop()
+            return await loop.run_in_executor(None, self._collect_system_status_sync)
             
+        except Exception as e:
+            logger.error(f"❌ Erro ao coletar status: {e}")
+            return self.current_status  # Retornar último status conhecido
+    
+    def _collect_system_status_sync(self) -> Dict[str, bool]:
+        """Coleta status atual do sistema (executado em thread separada)"""
+        db = SessionLocal()
+        try:
             # 1. Status da internet
-            internet_online = is_connected("8.8.8.8", 53, timeout=3)
+            internet_online = is_internet_connected(timeout=3)
             
             # 2. Status das câmeras (últimos 30 segundos)
             cutoff_time = datetime.utcnow() - timedelta(seconds=30)
             
-            camera_status = {}
-            for camera_num in range(1, 5):  # Câmeras 1-4
-                camera = db.query(Camera).filter(Camera.name == f'camera_{camera_num}').first()
+            # Câmeras 1-4 ativas carregadas de uma vez
+            camera_names = [f'camera_{camera_num}' for camera_num in range(1, 5)]
+            cameras = db.query(Camera.id, Camera.name).filter(
+                Camera.name.in_(camera_names),
+                Camera.is_active == True
+            ).all()
+            camera_ids = [camera.id for camera in cameras]
+            
+            # Último status recente de cada câmera em uma única consulta
+            connected_by_camera = {}
+            if camera_ids:
+                subquery = db.query(
+                    CameraStatus.camera_id,
+                    func.max(CameraStatus.timestamp).label('latest_timestamp')
+                ).filter(
+                    CameraStatus.camera_id.in_(camera_ids),
+                    CameraStatus.timestamp >= cutoff_time
+                ).group_by(CameraStatus.camera_id).subquery()
                 
-                if camera and camera.is_active:
-                    # Verificar último status da câmera
-                    latest_status = db.query(CameraStatus).filter(
-                        CameraStatus.camera_id == camera.id,
-                        CameraStatus.timestamp >= cutoff_time
-                    ).order_by(CameraStatus.timestamp.desc()).first()
-                    
-                    camera_status[f'camera_{camera_num}'] = (
-                        latest_status is not None and latest_status.is_connected
+                latest_statuses = db.query(CameraStatus.camera_id, CameraStatus.is_connected).join(
+                    subquery,
+                    and_(
+                        CameraStatus.camera_id == subquery.c.camera_id,
+                        CameraStatus.timestamp == subquery.c.latest_timestamp
                     )
-                else:
-                    camera_status[f'camera_{camera_num}'] = False
+                ).all()
+                connected_by_camera = {status.camera_id: bool(status.is_connected) for status in latest_statuses}
+            
+            camera_status = {name: False for name in camera_names}
+            for camera in cameras:
+                camera_status[camera.name] = connected_by_camera.get(camera.id, False)
             
             # 3. Status do PC (sempre True se chegou até aqui)
             pc_online = True
@@ -151,18 +178,14 @@ class StatusHandler:
             # 4. Status da aplicação (sempre True se chegou até aqui)
             application_running = True
             
-            db.close()
-            
             return {
                 'pc_online': pc_online,
                 'internet_online': internet_online,
                 'application_running': application_running,
                 **camera_status
             }
-            
-        except Exception as e:
-            logger.error(f"❌ Erro ao coletar status: {e}")
-            return self.current_status  # Retornar último status conhecido
+        finally:
+            db.close()
     
     def _status_changed(self, new_status: Dict[str, bool]) -> bool:
         """Verifica se o status mudou"""
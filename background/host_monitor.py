@@ -7,15 +7,21 @@ import threading
 import time
 from datetime import datetime
 
-from services.network_service import is_connected, get_public_ip, get_cpu_temperature
+from services.network_service import is_internet_connected, get_public_ip, get_cpu_temperature
 from models import HostStatus, SessionLocal
 
 
 def monitor_host():
     """Monitora o status do host"""
+    # Primeira leitura apenas inicia a contagem; as seguintes medem o uso desde a anterior
+    psutil.cpu_percent(interval=None)
+    
     while True:
+        # Aguardar antes de amostrar: a leitura de CPU cobre todo o intervalo desde a anterior
+        time.sleep(10)
+        
         try:
-            cpu = psutil.cpu_percent(interval=1)
+            cpu = psutil.cpu_percent(interval=None)
             ram = psutil.virtual_memory().percent
             disk = psutil.disk_usage('/').percent
 
@@ -31,7 +37,7 @@ def monitor_host():
                     cpu_usage=cpu,
                     ram_usage=ram,
                     disk_usage=disk,
-                    online=is_connected("8.8.8.8"),
+                    online=is_internet_connected(),
                     temperature=get_cpu_temperature(),
                     timestamp=datetime.utcnow(),
                 )
@@ -43,8 +49,6 @@ def monitor_host():
         except Exception as e:
             print(f"[HOST MONITOR] Erro: {e}")
 
-        time.sleep(10)
-
 
 def start_host_monitoring():
     """Inicia o monitoramento do host em thread separada"""
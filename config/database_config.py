@@ -6,7 +6,8 @@ from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from .app_config import app_config
-from models import AlertType, Base as ModelsBase, User
+from models import AlertType, Base as ModelsBase, CameraAlertCounter, User
+from services.alert_stats_service import rebuild_alert_counters
 from passlib.context import CryptContext
 
 # Configurações do banco de dados
@@ -54,6 +55,7 @@ def create_tables():
     ModelsBase.metadata.create_all(bind=engine, checkfirst=True)
     create_default_user()
     create_default_alert_types()
+    backfill_alert_counters()
     print("✅ Tabelas do banco de dados criadas com sucesso")
 
 def create_default_user():
@@ -124,6 +126,21 @@ def create_default_alert_types():
         db.close()
 
 
+def backfill_alert_counters():
+    """Preenche os contadores de alertas por câmera a partir de camera_alerts, apenas se estiverem vazios"""
+    db = SessionLocal()
+    try:
+        if db.query(CameraAlertCounter.camera_id).first() is not None:
+            return
+        cameras = rebuild_alert_counters(db)
+        print(f"Contadores de alertas preenchidos para {cameras} câmera(s)")
+    except Exception as e:
+        db.rollback()
+        print(f"Error backfilling alert counters: {e}")
+    finally:
+        db.close()
+
+
 def drop_tables():
     """Remove todas as tabelas do banco de dados"""
     ModelsBase.metadata.drop_all(bind=engine)
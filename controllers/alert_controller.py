@@ -9,6 +9,7 @@ from typing import List, Optional
 from config.security import security, get_current_user
 from config.database_config import get_database
 from models import AlertType, CameraAlert, Camera, User
+from services.alert_stats_service import increment_alert_counter, increment_resolved_counter
 from schemas import (AlertTypeCreate, AlertTypeResponse, AlertTypeListResponse,
                     CameraAlertCreate, CameraAlertResponse, CameraAlertListResponse)
 
@@ -93,6 +94,8 @@ def create_camera_alert(alert: CameraAlertCreate, current_user: User = Depends(g
         alert_metadata=alert.alert_metadata,    
     )
     db.add(new_alert)
+    db.flush()
+    increment_alert_counter(db, new_alert.camera_id, alert_type.code, new_alert.triggered_at)
     db.commit()
     db.refresh(new_alert)
     
@@ -166,15 +169,17 @@ def resolve_camera_alert(alert_id: int, current_user: User = Depends(get_current
     if alert.resolved:
         raise HTTPException(status_code=400, detail="Alert is already resolved")
     
+    alert_type = db.query(AlertType).filter(AlertType.id == alert.alert_type_id).first()
+    
     alert.resolved = True
     alert.resolved_at = datetime.utcnow()
     alert.resolved_by = current_user.username
+    increment_resolved_counter(db, alert.camera_id, alert_type.code if alert_type else None, alert.triggered_at)
     
     db.commit()
     db.refresh(alert)
     
     camera = db.query(Camera).filter(Camera.id == alert.camera_id).first()
-    alert_type = db.query(AlertType).filter(AlertType.id == alert.alert_type_id).first()
     
     return CameraAlertResponse(
         id=alert.id,
@@ -9,7 +9,7 @@ from typing import List
 
 from config.security import security, get_current_user
 from config.database_config import get_database
-from models import Camera, CameraStatus, AlertType, User, CameraAlert
+from models import Camera, CameraStatus, AlertType, User, CameraAlert, CameraAlertCounter
 from schemas import (CameraCreate, CameraUpdate, CameraResponse, CameraListResponse, 
                     CameraStatusResponse, CameraStatusListResponse)
 
@@ -217,6 +217,7 @@ def delete_camera(camera_id: int, current_user: User = Depends(get_current_user)
         
         # Delete related camera alerts
         db.query(CameraAlert).filter(CameraAlert.camera_id == camera_id).delete()
+        db.query(CameraAlertCounter).filter(CameraAlertCounter.camera_id == camera_id).delete()
         print(f"Deleted {alert_count} camera alert records for camera {camera_name}")
         
         # Now delete the camera itself
@@ -122,4 +122,13 @@ class CameraAlert(Base):
     # Relationships
     camera = relationship("Camera")
     alert_type = relationship("AlertType")
-    resolved_by_user = relationship("User")
\ No newline at end of file
+    resolved_by_user = relationship("User")
+
+class CameraAlertCounter(Base):
+    """Contadores de alertas por câmera, mantidos em O(1) a cada alerta"""
+    __tablename__ = "camera_alert_counters"
+    camera_id = Column(Integer, ForeignKey("cameras.id"), primary_key=True)
+    total_alerts = Column(Integer, default=0, nullable=False)
+    resolved_alerts = Column(Integer, default=0, nullable=False)
+    last_alert_at = Column(DateTime)
+    last_alert_type = Column(String)
@@ -0,0 +1,110 @@
+"""
+Serviços de estatísticas de alertas por câmera
+"""
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import and_, case, func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from models import AlertType, CameraAlert, CameraAlertCounter
+
+# Dialetos com INSERT ... ON CONFLICT DO UPDATE
+_UPSERT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def _upsert_counter(db: Session, camera_id: int, resolved: bool, alert_type_code: Optional[str], triggered_at: Optional[datetime], updates: dict):
+    """Cria o contador da câmera (alerta atual como o primeiro) ou aplica updates ao existente"""
+    values = {
+        "camera_id": camera_id,
+        "total_alerts": 1,
+        "resolved_alerts": 1 if resolved else 0,
+        "last_alert_at": triggered_at,
+        "last_alert_type": alert_type_code
+    }
+    insert = _UPSERT_INSERTS.get(db.get_bind().dialect.name)
+    if insert is not None:
+        db.execute(insert(CameraAlertCounter).values(**values).on_conflict_do_update(
+            index_elements=[CameraAlertCounter.camera_id],
+            set_=updates
+        ))
+        return
+    
+    # Demais bancos: atualiza e, se a câmera ainda não tem contador, insere
+    updated = db.query(CameraAlertCounter).filter(
+        CameraAlertCounter.camera_id == camera_id
+    ).update(updates, synchronize_session=False)
+    if not updated:
+        db.add(CameraAlertCounter(**values))
+        db.flush()
+
+
+def increment_alert_counter(db: Session, camera_id: int, alert_type_code: str, triggered_at: datetime):
+    """Incrementa o total de alertas da câmera (executado na mesma transação do insert do alerta)"""
+    _upsert_counter(db, camera_id, False, alert_type_code, triggered_at, {
+        "total_alerts": CameraAlertCounter.total_alerts + 1,
+        "last_alert_at": triggered_at,
+        "last_alert_type": alert_type_code
+    })
+
+
+def increment_resolved_counter(db: Session, camera_id: int, alert_type_code: Optional[str] = None, triggered_at: Optional[datetime] = None):
+    """Incrementa o total de alertas resolvidos da câmera.
+
+    Sem contador para a câmera, o alerta resolvido é registrado também no total,
+    mantendo resolved_alerts <= total_alerts.
+    """
+    _upsert_counter(db, camera_id, True, alert_type_code, triggered_at, {
+        "resolved_alerts": CameraAlertCounter.resolved_alerts + 1
+    })
+
+
+def rebuild_alert_counters(db: Session) -> int:
+    """Recalcula todos os contadores a partir de camera_alerts; retorna o número de câmeras.
+
+    Executado na inicialização (antes dos handlers de alerta) apenas quando a tabela de
+    contadores está vazia, para preencher câmeras com alertas anteriores a ela.
+    """
+    totals = db.query(
+        CameraAlert.camera_id,
+        func.count(CameraAlert.id).label('total_alerts'),
+        func.sum(case((CameraAlert.resolved == True, 1), else_=0)).label('resolved_alerts'),
+        func.max(CameraAlert.triggered_at).label('latest_triggered_at')
+    ).group_by(CameraAlert.camera_id).subquery()
+
+    # Tipo do alerta mais recente de cada câmera
+    rows = db.query(
+        totals.c.camera_id,
+        totals.c.total_alerts,
+        totals.c.resolved_alerts,
+        totals.c.latest_triggered_at,
+        func.max(AlertType.code)
+    ).outerjoin(
+        CameraAlert,
+        and_(
+            CameraAlert.camera_id == totals.c.camera_id,
+            CameraAlert.triggered_at == totals.c.latest_triggered_at
+        )
+    ).outerjoin(
+        AlertType, AlertType.id == CameraAlert.alert_type_id
+    ).group_by(
+        totals.c.camera_id, totals.c.total_alerts, totals.c.resolved_alerts, totals.c.latest_triggered_at
+    ).all()
+
+    db.query(CameraAlertCounter).delete(synchronize_session=False)
+    db.add_all([
+        CameraAlertCounter(
+            camera_id=camera_id,
+            total_alerts=total,
+            resolved_alerts=resolved or 0,
+            last_alert_at=last_alert_at,
+            last_alert_type=last_alert_type
+        )
+        for camera_id, total, resolved, last_alert_at, last_alert_type in rows
+    ])
+    db.commit()
+    return len(rows)
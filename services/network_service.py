@@ -2,9 +2,20 @@
 Serviços de rede e conectividade
 """
 import socket
+import threading
+import time
+from typing import Optional, Tuple
+
 import requests
 import psutil
 
+# Teste de internet compartilhado entre host_monitor e StatusHandler
+INTERNET_CHECK_HOST = "8.8.8.8"
+INTERNET_CHECK_TTL = 5  # segundos em que o último resultado é reaproveitado
+
+_internet_check_lock = threading.Lock()
+_last_internet_check: Optional[Tuple[float, bool]] = None
+
 
 def is_connected(host, port=53, timeout=3):
     """Verifica se um host está conectado"""
@@ -18,6 +29,19 @@ def is_connected(host, port=53, timeout=3):
         return False
 
 
+def is_internet_connected(timeout=3):
+    """Verifica a conexão com a internet, reaproveitando o último teste por INTERNET_CHECK_TTL segundos"""
+    global _last_internet_check
+    # Chamadas simultâneas aguardam o mesmo teste em vez de abrir novas conexões
+    with _internet_check_lock:
+        if _last_internet_check is not None and time.monotonic() - _last_internet_check[0] < INTERNET_CHECK_TTL:
+            return _last_internet_check[1]
+        
+        online = is_connected(INTERNET_CHECK_HOST, 53, timeout=timeout)
+        _last_internet_check = (time.monotonic(), online)
+        return online
+
+
 def get_public_ip():
     """Obtém o IP público da máquina"""
     try: